@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Benchmarks
+Micro-benchmarks for the hot paths in cricket_stats_analyzer.py, synthetic
+stats CSVs and photo galleries, and a whole-pipeline benchmark that times
+every stage against a stored baseline.
+
+Usage:
+    python benchmarks.py metrics --rows 1000000
+    python benchmarks.py fuzzy --roster 20000 --names 5000
+    python benchmarks.py blocking --rosters 10000 100000 --names 2000
+    python benchmarks.py keywords --texts 20000 --roster 1000 --edits 1
+    python benchmarks.py grouped --rows 1000000 --missing-rate 0.02
+    python benchmarks.py make-stats --rows 10000000 --typo-rate 0.1 --out stats_10m.csv
+    python benchmarks.py make-gallery --photos 200 --text-rate 0.3 --out gallery
+    python benchmarks.py pipeline --rows 1000 100000 1000000 --photos 50
+    python benchmarks.py pipeline --rows 1000 100000 1000000 --photos 50 --update-baseline
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+import platform
+import random
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont
+
+import cricket_stats_analyzer as csa
+from keyword_matcher import KeywordMatcher, MIN_EDIT_LENGTH, edit_variants
+from image_ingest import find_images
+from instrumentation import end_run, span, start_run
+from photo_dedup import cluster_duplicates
+from photo_index import name_tokens
+
+# The photo analytics script's OCR category keywords
+OCR_KEYWORDS = ['trophy', 'runner', 'ccpl', 'man of', 'award', 'leaderboard', 'points', 'table']
+
+GROUPED_DIMENSIONS = ['season', 'opponent', 'venue']
+
+# Synthetic data
+TYPO_VARIANTS = 200  # Misspellings generated per player; misspelled rows draw from these
+CSV_CHUNK_ROWS = 1_000_000  # Rows generated and written at a time
+GALLERY_SIZE = (1600, 1200)  # Synthetic photo width x height (px)
+PHOTO_TEXTS = ['CCPL 2025 RUNNER UP', 'MAN OF THE MATCH', 'LEADERBOARD POINTS TABLE', 'CHAMPIONS TROPHY',
+               'BEST BOWLER AWARD']
+PHOTO_SCENES = ['holdingcup', 'batting', 'bowling', 'fullteam', 'celebration', 'practise']
+
+# Pipeline benchmark
+BENCHMARK_DIR = 'benchmark_data'  # Generated CSVs, galleries and pipeline outputs, reused across runs
+BASELINE_PATH = 'benchmark_baseline.json'
+REGRESSION_THRESHOLD = 0.25  # Flag steps more than 25% slower (or larger in peak RSS) than the baseline
+MIN_BASELINE_SECONDS = 0.1  # Steps faster than this in the baseline are timer noise and never flagged
+STREAMING_MIN_ROWS = 2_000_000  # Larger CSVs are benchmarked on the streaming path (STREAMING_CHUNK_SIZE)
+STREAMING_BENCH_CHUNK = 500_000
+
+
+def _timed(fn, *args, **kwargs):
+    """Run fn once and return (result, seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def make_metric_frame(rows: int, seed: int = csa.SEED) -> pd.DataFrame:
+    """Synthetic per-row stats with zeros and NaNs in every denominator."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'runs': rng.integers(0, 120, rows).astype(float),
+        'balls': rng.integers(0, 90, rows).astype(float),
+        'dismissals': rng.integers(0, 2, rows).astype(float),
+        'runs_conceded': rng.integers(0, 60, rows).astype(float),
+        'overs': rng.integers(0, 5, rows).astype(float),
+        'wickets': rng.integers(0, 4, rows).astype(float),
+    })
+    df['balls_bowled'] = df['overs'] * 6
+    for col in df.columns:
+        df.loc[df.sample(frac=0.01, random_state=seed).index, col] = np.nan
+    return df
+
+
+def _rowwise_ratio_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """The pre-vectorization implementation: one safe_divide call per row per metric."""
+    out = pd.DataFrame(index=df.index)
+    for name, num_col, den_col, scale in csa.RATIO_METRICS:
+        out[name] = df.apply(lambda x: csa.safe_divide(x[num_col] * scale, x[den_col]), axis=1)
+    return out
+
+
+def bench_metrics(rows: int, skip_rowwise: bool = False):
+    """Compare row-wise df.apply(safe_divide) with the vectorized metric engine."""
+    df = make_metric_frame(rows)
+    print(f"Ratio metrics on {rows:,} rows ({len(csa.RATIO_METRICS)} metrics)")
+
+    vectorized, t_vec = _timed(csa.apply_ratio_metrics, df.copy())
+    print(f"  vectorized : {t_vec:8.3f}s")
+
+    if skip_rowwise:
+        return
+
+    rowwise, t_row = _timed(_rowwise_ratio_metrics, df)
+    print(f"  row-wise   : {t_row:8.3f}s")
+    print(f"  speedup    : {t_row / t_vec:8.1f}x")
+
+    for name, _, _, _ in csa.RATIO_METRICS:
+        np.testing.assert_array_equal(rowwise[name].to_numpy(dtype=float),
+                                      vectorized[name].to_numpy(dtype=float))
+    print("  results    : identical (including NaN positions)")
+
+
+def make_grouped_frame(rows: int, missing_rate: float, seed: int = csa.SEED) -> pd.DataFrame:
+    """Per-player rows keyed by season, opponent and venue, with missing_rate of each key blank."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'canonical_player': rng.choice(np.array(csa.PLAYERS_WHITELIST, dtype=object), rows),
+        'season': pd.array(rng.integers(2022, 2026, rows), dtype='Int64'),
+        'opponent': rng.choice(np.array([f"Team {c}" for c in 'ABCDEFGH'], dtype=object), rows),
+        'venue': rng.choice(np.array([f"Ground {i}" for i in range(1, 7)], dtype=object), rows),
+    })
+    for col in csa.PLAYER_AGGREGATIONS:
+        df[col] = rng.integers(0, 50, rows)
+    for dim in GROUPED_DIMENSIONS:
+        df.loc[rng.random(rows) < missing_rate, dim] = None
+    return df
+
+
+def bench_grouped(rows: int, missing_rate: float):
+    """Compare cube rollups with one direct groupby per dimension (results must match exactly)."""
+    df = make_grouped_frame(rows, missing_rate)
+    print(f"Grouped stats on {rows:,} rows by {', '.join(GROUPED_DIMENSIONS)} ({missing_rate:.0%} of each key missing)")
+
+    rollups, t_cube = _timed(csa.aggregate_grouped_stats, df, GROUPED_DIMENSIONS)
+    print(f"  cube rollups   : {t_cube:8.3f}s")
+
+    def direct():
+        return {dim: csa.finalize_player_stats(csa.sum_player_stats(df, keys=[dim, 'canonical_player']))
+                for dim in GROUPED_DIMENSIONS}
+
+    expected, t_direct = _timed(direct)
+    print(f"  direct groupby : {t_direct:8.3f}s")
+
+    for dim in GROUPED_DIMENSIONS:
+        pd.testing.assert_frame_equal(rollups[dim], expected[dim], check_dtype=False)
+        print(f"  {dim:<15}: identical ({rollups[dim]['runs'].sum():,} runs in {rollups[dim][dim].nunique()} slices)")
+
+
+def make_roster(size: int, seed: int = csa.SEED) -> List[str]:
+    """Synthetic 'First Last' roster with realistic name lengths."""
+    rng = random.Random(seed)
+    syllables = ['ak', 'hil', 'vish', 'nu', 'red', 'dy', 'fai', 'zan', 'din', 'esh',
+                 'ka', 'rth', 'ik', 'har', 'shi', 'th', 'pu', 'sh', 'kar', 'sa', 'i', 'pa', 'tel']
+
+    def word():
+        return ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+
+    roster = set()
+    while len(roster) < size:
+        roster.add(f"{word()} {word()}")
+    return sorted(roster)
+
+
+def make_typos(roster: List[str], count: int, typo_rate: float = 0.5, seed: int = csa.SEED) -> List[str]:
+    """Draw names from the roster, dropping one character from typo_rate of them."""
+    rng = random.Random(seed)
+    names = []
+    for name in rng.choices(roster, k=count):
+        if rng.random() < typo_rate:
+            i = rng.randrange(len(name))
+            name = name[:i] + name[i + 1:]
+        names.append(name)
+    return list(dict.fromkeys(names))
+
+
+def bench_fuzzy(roster_size: int, name_count: int, workers: int):
+    """Compare the one-name-at-a-time extractOne loop with cdist batch matching."""
+    roster = make_roster(roster_size)
+    names = make_typos(roster, name_count)
+    print(f"Fuzzy matching {len(names):,} unique names against {len(roster):,} roster entries")
+
+    looped, t_loop = _timed(csa.match_names, names, roster, batch=False)
+    print(f"  extractOne loop : {t_loop:8.3f}s")
+
+    batched, t_batch = _timed(csa.match_names, names, roster, batch=True, workers=workers)
+    print(f"  cdist batch     : {t_batch:8.3f}s (workers={workers})")
+    print(f"  speedup         : {t_loop / t_batch:8.1f}x")
+
+    assert looped == batched, "batch matching diverged from extractOne"
+    print("  results         : identical")
+
+
+def bench_blocking(roster_sizes: List[int], name_count: int, threshold: int):
+    """Recall and latency of the blocking index against the exhaustive cdist scan."""
+    for size in roster_sizes:
+        roster = make_roster(size)
+        names = make_typos(roster, name_count)
+        print(f"Blocking index: {len(names):,} unique names against {len(roster):,} roster entries")
+
+        full, t_full = _timed(csa.match_names, names, roster, batch=True, blocking=False)
+        csa.build_blocking_index.cache_clear()
+        _, t_index = _timed(csa.build_blocking_index, tuple(roster))
+        blocked, t_blocked = _timed(csa.match_names, names, roster, batch=True, blocking=True,
+                                    threshold=threshold)
+
+        # Recall: share of full-scan matches above threshold that blocking also finds
+        expected = {n for n, (best, score) in full.items() if score >= threshold}
+        found = {n for n in expected if blocked[n][0] == full[n][0] and blocked[n][1] >= threshold}
+        recall = len(found) / len(expected) if expected else 1.0
+
+        print(f"  full scan  : {t_full:8.3f}s")
+        print(f"  index build: {t_index:8.3f}s")
+        print(f"  blocked    : {t_blocked:8.3f}s ({t_full / t_blocked:.1f}x faster)")
+        print(f"  recall     : {recall:8.2%} of {len(expected):,} matches >= {threshold}")
+
+
+def make_ocr_corpus(count: int, words: int, vocabulary: List[str], typo_rate: float = 0.05,
+                    seed: int = csa.SEED) -> List[str]:
+    """OCR-like blobs: mostly random syllable words, some vocabulary hits, a few misread characters."""
+    rng = random.Random(seed)
+    syllables = ['ta', 'ble', 'ro', 'un', 'ne', 'po', 'in', 'aw', 'ar', 'le', 'ad', 'er', 'ma', 'of']
+    texts = []
+    for _ in range(count):
+        tokens = []
+        for _ in range(words):
+            if rng.random() < 0.05:
+                token = rng.choice(vocabulary)
+            else:
+                token = ''.join(rng.choice(syllables) for _ in range(rng.randint(1, 4)))
+            if rng.random() < typo_rate and len(token) > 1:
+                i = rng.randrange(len(token))
+                token = token[:i] + rng.choice('0l1|') + token[i + 1:]
+            tokens.append(token.title() if rng.random() < 0.3 else token)
+        texts.append(' '.join(tokens))
+    return texts
+
+
+def bench_keywords(text_count: int, words: int, roster_size: int, edits: int, edit_sample: int):
+    """Compare one 'keyword in text' scan per keyword with a single Aho-Corasick pass."""
+    keywords = list(dict.fromkeys(OCR_KEYWORDS + [t for name in make_roster(roster_size) for t in name_tokens(name)]))
+    texts = make_ocr_corpus(text_count, words, keywords)
+    print(f"Keyword scan: {len(keywords):,} keywords over {len(texts):,} texts "
+          f"({sum(map(len, texts)) / 1e6:.1f}M characters)")
+
+    looped, t_loop = _timed(lambda: [{k for k in keywords if k in text.lower()} for text in texts])
+    print(f"  per-keyword scans : {t_loop:8.3f}s")
+    matcher, t_compile = _timed(KeywordMatcher, [(k, k) for k in keywords])
+    scanned, t_scan = _timed(matcher.scan, texts)
+    print(f"  automaton compile : {t_compile:8.3f}s ({matcher.states:,} states)")
+    print(f"  automaton scan    : {t_scan:8.3f}s ({t_loop / t_scan:.1f}x faster)")
+    assert looped == scanned, "automaton diverged from per-keyword scans"
+    print("  results           : identical")
+
+    if edits:
+        # Typo tolerance is for the category keywords; without an automaton every
+        # edit variant is its own scan, so the baseline is timed on a sample
+        variants = [(v, k) for k in OCR_KEYWORDS
+                    for v in (edit_variants(k, edits) if len(k) >= MIN_EDIT_LENGTH else {k})
+                    if v == k or len(v) >= MIN_EDIT_LENGTH]
+        sample = texts[:edit_sample]
+        # Edit variants only count as whole words
+        words = [(re.compile(rf'(?<![a-z0-9]){re.escape(v)}(?![a-z0-9])'), k) for v, k in variants if v != k]
+        looped, t_loop = _timed(lambda: [{k for k in OCR_KEYWORDS if k in text.lower()}
+                                         | {k for word, k in words if word.search(text.lower())}
+                                         for text in sample])
+        matcher, t_compile = _timed(KeywordMatcher, [(k, k) for k in OCR_KEYWORDS], max_edits=edits)
+        scanned, t_scan = _timed(matcher.scan, sample)
+        _, t_full = _timed(matcher.scan, texts)
+        print(f"Category keywords with up to {edits} edit(s): {len(variants):,} variant patterns, "
+              f"{matcher.states:,} states")
+        print(f"  per-variant scans : {t_loop:8.3f}s on {len(sample):,} texts")
+        print(f"  automaton scan    : {t_scan:8.3f}s on {len(sample):,} texts ({t_loop / t_scan:.1f}x faster), "
+              f"{t_full:.3f}s on all (compile {t_compile:.3f}s)")
+        assert looped == scanned, "fuzzy automaton diverged from per-variant scans"
+        print("  results           : identical")
+        typos = ['Tr0phy presentation', 'Leaderbord week 3', 'Best bowler awerd']
+        plain = ['Parking available', 'forward', 'Plan of the day', 'Timer unit']
+        assert all(matcher.scan(typos)), "fuzzy automaton missed a one-edit typo"
+        assert not any(matcher.scan(plain)), "fuzzy automaton matched text with no keyword in it"
+        print("  typos / non-keywords: matched / unmatched")
+
+
+def make_name_typo(name: str, rng: random.Random) -> str:
+    """
+    One realistic misspelling: a case or spacing slip (normalize_names fixes
+    these) or a dropped, doubled, swapped or wrong letter (left to fuzzy
+    matching).
+    """
+    i = rng.randrange(len(name))
+    kind = rng.choice(['case', 'space', 'drop', 'double', 'swap', 'letter'])
+    if kind == 'case':
+        return name.lower() if rng.random() < 0.5 else name.upper()
+    if kind == 'space':
+        return f"  {name.replace(' ', '  ')} "
+    if kind == 'drop':
+        return name[:i] + name[i + 1:]
+    if kind == 'double':
+        return name[:i] + name[i] + name[i:]
+    if kind == 'swap' and i < len(name) - 1:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice('abcdefghijklmnopqrstuvwxyz') + name[i + 1:]
+
+
+def make_stats_csv(path: str, rows: int, typo_rate: float = 0.1, unknown_rate: float = 0.02,
+                   roster: Optional[List[str]] = None, seed: int = csa.SEED) -> str:
+    """
+    Write a synthetic stats CSV in the sample_stats.csv layout, one row per
+    player per match, CSV_CHUNK_ROWS at a time so 10M-row files never sit in
+    memory. typo_rate of rows misspell their player (make_name_typo);
+    unknown_rate of rows are players outside the roster, which the
+    whitelist filter drops.
+    """
+    roster = roster or csa.PLAYERS_WHITELIST
+    rng = np.random.default_rng(seed)
+    spelling_rng = random.Random(seed)
+    names = np.array(roster, dtype=object)
+    typos = np.array([[make_name_typo(name, spelling_rng) for _ in range(TYPO_VARIANTS)] for name in roster],
+                     dtype=object)
+    unknown = np.array([name for name in make_roster(50, seed + 1) if name not in roster], dtype=object)
+    dates = pd.date_range('2022-01-01', '2025-12-31', freq='D').strftime('%Y-%m-%d').to_numpy()
+    opponents = np.array([f"Team {c}" for c in 'ABCDEFGH'], dtype=object)
+    venues = np.array([f"Ground {i}" for i in range(1, 7)], dtype=object)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    written = 0
+    with open(tmp_path, 'w', newline='') as f:
+        while written < rows:
+            n = min(CSV_CHUNK_ROWS, rows - written)
+            player = rng.integers(0, len(roster), n)
+            players = names[player]
+            draw = rng.random(n)
+            typo = draw < typo_rate
+            players[typo] = typos[player[typo], rng.integers(0, TYPO_VARIANTS, typo.sum())]
+            stranger = draw >= 1 - unknown_rate
+            players[stranger] = rng.choice(unknown, stranger.sum())
+
+            innings = rng.integers(0, 2, n)
+            balls = rng.integers(1, 80, n) * innings
+            runs = (balls * rng.uniform(0.4, 2.0, n)).astype(int)
+            fours = np.minimum(rng.poisson(runs / 15), runs // 4)
+            sixes = np.minimum(rng.poisson(runs / 40), (runs - 4 * fours) // 6)
+            overs = rng.integers(0, 5, n)
+            runs_conceded = rng.integers(0, 9, n) * overs
+            chunk = pd.DataFrame({
+                'player': players,
+                'matches': 1,
+                'innings': innings,
+                'runs': runs,
+                'balls': balls,
+                'fours': fours,
+                'sixes': sixes,
+                'highest': runs,
+                'not_outs': (rng.random(n) < 0.15) * innings,
+                'wickets': rng.binomial(overs, 0.3),
+                'overs': overs,
+                'maidens': rng.binomial(overs, 0.1),
+                'runs_conceded': runs_conceded,
+                'dots': rng.binomial(overs * 6, 0.4),
+                'catches': rng.binomial(1, 0.2, n),
+                'stumpings': rng.binomial(1, 0.02, n),
+                'run_outs': rng.binomial(1, 0.05, n),
+                'date': rng.choice(dates, n),
+                'opponent': rng.choice(opponents, n),
+                'venue': rng.choice(venues, n),
+            })
+            chunk.to_csv(f, header=written == 0, index=False)
+            written += n
+    os.replace(tmp_path, path)
+    return path
+
+
+def make_photo(rng: np.random.Generator, text: Optional[str] = None,
+               size: tuple = GALLERY_SIZE) -> Image.Image:
+    """
+    A cricket-ground-like scene: sky and grass gradients with sensor noise
+    and a few player-sized blobs. With text, a black-on-white caption
+    banner is added, big enough for the OCR gate to see.
+    """
+    width, height = size
+    y = np.linspace(0, 1, height)[:, None]
+    horizon = rng.uniform(0.3, 0.6)
+    sky = rng.uniform([90, 150, 200], [150, 200, 255])
+    grass = rng.uniform([40, 110, 30], [90, 170, 80])
+    rows = np.where(y < horizon, sky * (0.85 + 0.15 * y / horizon), grass * (0.9 + 0.2 * (y - horizon)))
+    pixels = rows[:, None, :] + rng.normal(0, 6, (height, width, 3))
+    img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    draw = ImageDraw.Draw(img)
+    for _ in range(rng.integers(3, 12)):
+        x, y0 = rng.uniform(0.05, 0.95) * width, rng.uniform(horizon, 0.95) * height
+        r = rng.uniform(0.02, 0.06) * height
+        draw.ellipse([x - r / 2, y0 - r * 2, x + r / 2, y0 + r * 2],
+                     fill=tuple(int(c) for c in rng.integers(0, 256, 3)))
+
+    if text:
+        # Drawn small with the built-in font, then scaled up with hard edges
+        font = ImageFont.load_default()
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        label = Image.new('L', (right - left + 8, bottom - top + 8), 255)
+        ImageDraw.Draw(label).text((4 - left, 4 - top), text, fill=0, font=font)
+        scale = max(int(height * 0.08 / label.height), 1)
+        label = label.resize((label.width * scale, label.height * scale), Image.Resampling.NEAREST)
+        img.paste(label.convert('RGB'), (int(rng.uniform(0, max(width - label.width, 1))), int(height * 0.05)))
+    return img
+
+
+def make_gallery(directory: str, photos: int, text_rate: float = 0.3, duplicate_rate: float = 0.1,
+                 roster: Optional[List[str]] = None, seed: int = csa.SEED) -> List[str]:
+    """
+    Write a synthetic JPEG gallery and return its paths. text_rate of the
+    photos carry a caption (OCR work); duplicate_rate are resized,
+    re-encoded copies of an earlier photo (near-duplicates). Filenames run
+    player names together with a scene word, like the real gallery
+    ("akhilreddydanda_holdingcup_0007.jpg"), for the photo index.
+    """
+    roster = roster or csa.PLAYERS_WHITELIST
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(photos):
+        player = re.sub(r'[^a-z0-9]', '', roster[rng.integers(len(roster))].lower())
+        stem = f"{player}_{PHOTO_SCENES[rng.integers(len(PHOTO_SCENES))]}_{i:04d}"
+        if paths and rng.random() < duplicate_rate:
+            with Image.open(paths[rng.integers(len(paths))]) as original:
+                copy = original.resize((original.width * 9 // 10, original.height * 9 // 10),
+                                       Image.Resampling.BILINEAR)
+            path = os.path.join(directory, f"{stem}_copy.jpg")
+            copy.save(path, quality=70)
+        else:
+            text = PHOTO_TEXTS[rng.integers(len(PHOTO_TEXTS))] if rng.random() < text_rate else None
+            path = os.path.join(directory, f"{stem}.jpg")
+            make_photo(rng, text).save(path, quality=85)
+        paths.append(path)
+    return paths
+
+
+def synthetic_inputs(workdir: str, rows: int, typo_rate: float, photos: int, text_rate: float):
+    """(CSV path, gallery directory) for a benchmark, generated on first use and reused after."""
+    csv_path = os.path.join(workdir, f"stats_{rows}_typo{typo_rate:g}.csv")
+    if not os.path.exists(csv_path):
+        _, seconds = _timed(make_stats_csv, csv_path, rows, typo_rate)
+        print(f"Generated {rows:,}-row stats CSV in {seconds:.1f}s: {csv_path}")
+
+    gallery = ""
+    if photos:
+        gallery = os.path.join(workdir, f"gallery_{photos}_text{text_rate:g}")
+        done_marker = os.path.join(gallery, '.complete')
+        if not os.path.exists(done_marker):
+            _, seconds = _timed(make_gallery, gallery, photos, text_rate)
+            open(done_marker, 'w').close()
+            print(f"Generated {photos}-photo gallery in {seconds:.1f}s: {gallery}")
+    return csv_path, gallery
+
+
+def run_pipeline(csv_path: str, images_dir: str, output_dir: str, chunk_size: Optional[int] = None) -> Dict:
+    """
+    One cricket_stats_analyzer.main() run on the given inputs with every
+    cache off, so each stage does its full work, plus the photo analytics
+    script's near-duplicate clustering on the gallery. Returns the run
+    metrics (see instrumentation.RunMetrics.summary).
+    """
+    settings = {
+        'STATS_CSV_PATH': csv_path,
+        'IMAGES_DIR': images_dir,
+        'OUTPUT_DIR': output_dir,
+        'STREAMING_CHUNK_SIZE': chunk_size,
+        'INCREMENTAL_STATE_PATH': "",
+        'GROUPED_LEADERBOARD_DIMENSIONS': [] if chunk_size else ['season', 'opponent', 'venue'],
+        'NAME_CACHE_PATH': "",
+        'FRAME_CACHE_DIR': "",
+        'PHOTO_CACHE_PATH': "",
+        'PHOTO_INDEX_PATH': "",
+        'CHART_CACHE': False,
+        'METRICS_PATH': os.path.join(output_dir, 'run_metrics.json'),
+        'PROFILE_PATH': "",
+    }
+    saved = {name: getattr(csa, name) for name in settings}
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        for name, value in settings.items():
+            setattr(csa, name, value)
+        csa.main()
+    finally:
+        for name, value in saved.items():
+            setattr(csa, name, value)
+    with open(settings['METRICS_PATH']) as f:
+        metrics = json.load(f)
+
+    if images_dir:
+        start_run()
+        with span('cluster_duplicates') as counts:
+            paths = find_images(images_dir)
+            counts['images'] = len(paths)
+            counts['clusters'] = len(cluster_duplicates(paths))
+        metrics['spans']['cluster_duplicates'] = end_run().summary()['spans']['cluster_duplicates']
+    return metrics
+
+
+def best_of(runs: List[Dict]) -> Dict:
+    """Per step, the lowest wall time, CPU time and peak RSS over repeated runs (the least noisy)."""
+    spans = {'run': {'wall_seconds': min(run['wall_seconds'] for run in runs),
+                     'cpu_seconds': min(run['cpu_seconds'] for run in runs),
+                     'peak_rss_mb': min(run['peak_rss_mb'] or 0.0 for run in runs), 'items': {}}}
+    for name in runs[0]['spans']:
+        records = [run['spans'][name] for run in runs if name in run['spans']]
+        spans[name] = {'wall_seconds': min(r['wall_seconds'] for r in records),
+                       'cpu_seconds': min(r['cpu_seconds'] for r in records),
+                       'peak_rss_mb': min(r['peak_rss_mb'] for r in records),
+                       'items': records[0]['items']}
+    fastest = min(runs, key=lambda run: run['wall_seconds'])
+    return {'critical_path': fastest['pipeline']['critical_path'], 'spans': spans}
+
+
+def benchmark_environment() -> Dict:
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'pandas': pd.__version__, 'numpy': np.__version__}
+
+
+def find_regressions(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Steps more than threshold slower, or larger in peak RSS, than in the baseline."""
+    regressions = []
+    for name, record in current['spans'].items():
+        base = baseline['spans'].get(name)
+        if not base:
+            continue
+        slower = (base['wall_seconds'] >= MIN_BASELINE_SECONDS
+                  and record['wall_seconds'] > base['wall_seconds'] * (1 + threshold))
+        larger = bool(base['peak_rss_mb']) and record['peak_rss_mb'] > base['peak_rss_mb'] * (1 + threshold)
+        if slower or larger:
+            regressions.append(name)
+    return regressions
+
+
+def print_pipeline_table(current: Dict, baseline: Optional[Dict], regressions: List[str]):
+    width = max(len(name) for name in current['spans'])
+    print(f"  {'step':<{width}}  {'wall s':>8} {'cpu s':>8} {'peak MB':>8} {'base s':>8} {'change':>7}  items")
+    for name, record in current['spans'].items():
+        base = baseline['spans'].get(name) if baseline else None
+        base_text = f"{base['wall_seconds']:8.3f}" if base else f"{'-':>8}"
+        change = (f"{record['wall_seconds'] / base['wall_seconds'] - 1:+7.0%}"
+                  if base and base['wall_seconds'] else f"{'':>7}")
+        items = ', '.join(f"{key}={value:,.0f}" for key, value in record['items'].items())
+        flag = '  << REGRESSION' if name in regressions else ''
+        print(f"  {name:<{width}}  {record['wall_seconds']:8.3f} {record['cpu_seconds']:8.3f} "
+              f"{record['peak_rss_mb']:8.1f} {base_text} {change}  {items}{flag}")
+    print(f"  critical path: {' -> '.join(current['critical_path'])}")
+
+
+def bench_pipeline(row_counts: List[int], typo_rate: float, photos: int, text_rate: float, repeat: int,
+                   workdir: str, baseline_path: str, update_baseline: bool, threshold: float,
+                   verbose: bool = False) -> bool:
+    """
+    Run the whole pipeline on synthetic inputs of each size and compare
+    every step with the stored baseline for that size. Returns False when
+    any step regressed by more than threshold.
+    """
+    if not verbose:
+        csa.logger.setLevel(logging.ERROR)
+    stored = {'runs': {}}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            stored = json.load(f)
+
+    ok = True
+    for rows in row_counts:
+        chunk_size = STREAMING_BENCH_CHUNK if rows >= STREAMING_MIN_ROWS else None
+        csv_path, gallery = synthetic_inputs(workdir, rows, typo_rate, photos, text_rate)
+        key = f"rows={rows} typo_rate={typo_rate:g} photos={photos} text_rate={text_rate:g}"
+        runs = [run_pipeline(csv_path, gallery, os.path.join(workdir, 'outputs'), chunk_size)
+                for _ in range(repeat)]
+        current = dict(best_of(runs), recorded=datetime.now().isoformat(timespec='seconds'),
+                       environment=benchmark_environment(), streaming=bool(chunk_size))
+        baseline = stored['runs'].get(key)
+        regressions = find_regressions(current, baseline, threshold) if baseline else []
+
+        print(f"Pipeline: {key}{' (streaming)' if chunk_size else ''}, best of {repeat}")
+        if baseline and baseline['environment'] != current['environment']:
+            print(f"  note: baseline recorded {baseline['recorded']} on a different setup {baseline['environment']}")
+        print_pipeline_table(current, baseline, regressions)
+        if update_baseline:
+            stored['runs'][key] = current
+        elif baseline is None:
+            print("  no baseline for this size yet (record one with --update-baseline)")
+        elif regressions:
+            ok = False
+            print(f"  {len(regressions)} regression(s) beyond {threshold:.0%}: {', '.join(regressions)}")
+        else:
+            print(f"  no regressions beyond {threshold:.0%}")
+
+    if update_baseline:
+        tmp_path = baseline_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(stored, f, indent=2)
+        os.replace(tmp_path, baseline_path)
+        print(f"Baseline saved: {baseline_path}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_metrics = sub.add_parser('metrics', help='vectorized vs row-wise ratio metrics')
+    p_metrics.add_argument('--rows', type=int, default=1_000_000)
+    p_metrics.add_argument('--skip-rowwise', action='store_true',
+                           help='only time the vectorized engine')
+
+    p_fuzzy = sub.add_parser('fuzzy', help='extractOne loop vs cdist batch matching')
+    p_fuzzy.add_argument('--roster', type=int, default=20_000)
+    p_fuzzy.add_argument('--names', type=int, default=5_000)
+    p_fuzzy.add_argument('--workers', type=int, default=-1)
+
+    p_blocking = sub.add_parser('blocking', help='blocking index recall and latency')
+    p_blocking.add_argument('--rosters', type=int, nargs='+', default=[10_000, 100_000])
+    p_blocking.add_argument('--names', type=int, default=2_000)
+    p_blocking.add_argument('--threshold', type=int, default=csa.FUZZY_MATCH_THRESHOLD)
+
+    p_keywords = sub.add_parser('keywords', help='per-keyword scans vs one Aho-Corasick pass')
+    p_keywords.add_argument('--texts', type=int, default=20_000)
+    p_keywords.add_argument('--words', type=int, default=60, help='words per OCR text')
+    p_keywords.add_argument('--roster', type=int, default=1_000, help='players whose name tokens are keywords')
+    p_keywords.add_argument('--edits', type=int, default=1,
+                            help='typo tolerance to also benchmark on the category keywords (0 = skip)')
+    p_keywords.add_argument('--edit-sample', type=int, default=2_000,
+                            help='texts the slow per-variant baseline is timed on')
+
+    p_grouped = sub.add_parser('grouped', help='cube rollups vs direct per-dimension groupby')
+    p_grouped.add_argument('--rows', type=int, default=1_000_000)
+    p_grouped.add_argument('--missing-rate', type=float, default=0.02, help='share of blank keys per dimension')
+
+    p_stats = sub.add_parser('make-stats', help='write a synthetic stats CSV')
+    p_stats.add_argument('--rows', type=int, default=100_000)
+    p_stats.add_argument('--typo-rate', type=float, default=0.1, help='share of rows with a misspelled player')
+    p_stats.add_argument('--unknown-rate', type=float, default=0.02, help='share of rows with off-roster players')
+    p_stats.add_argument('--out', default='synthetic_stats.csv')
+
+    p_gallery = sub.add_parser('make-gallery', help='write a synthetic JPEG gallery')
+    p_gallery.add_argument('--photos', type=int, default=100)
+    p_gallery.add_argument('--text-rate', type=float, default=0.3, help='share of photos with a caption')
+    p_gallery.add_argument('--duplicate-rate', type=float, default=0.1, help='share of near-duplicate copies')
+    p_gallery.add_argument('--out', default='synthetic_gallery')
+
+    p_pipeline = sub.add_parser('pipeline', help='time every pipeline stage against a stored baseline')
+    p_pipeline.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000],
+                            help=f"CSV sizes to benchmark (streamed from {STREAMING_MIN_ROWS:,} rows)")
+    p_pipeline.add_argument('--typo-rate', type=float, default=0.1)
+    p_pipeline.add_argument('--photos', type=int, default=50, help='synthetic gallery size (0 = no photos)')
+    p_pipeline.add_argument('--text-rate', type=float, default=0.3)
+    p_pipeline.add_argument('--repeat', type=int, default=3, help='runs per size; the best time counts')
+    p_pipeline.add_argument('--workdir', default=BENCHMARK_DIR)
+    p_pipeline.add_argument('--baseline', default=BASELINE_PATH)
+    p_pipeline.add_argument('--update-baseline', action='store_true',
+                            help='store these results as the baseline instead of comparing')
+    p_pipeline.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                            help='slowdown (0.25 = 25%%) that counts as a regression')
+    p_pipeline.add_argument('--verbose', action='store_true', help='keep the analyzer log output')
+
+    args = parser.parse_args()
+    if args.command == 'metrics':
+        bench_metrics(args.rows, args.skip_rowwise)
+    elif args.command == 'fuzzy':
+        bench_fuzzy(args.roster, args.names, args.workers)
+    elif args.command == 'blocking':
+        bench_blocking(args.rosters, args.names, args.threshold)
+    elif args.command == 'keywords':
+        bench_keywords(args.texts, args.words, args.roster, args.edits, args.edit_sample)
+    elif args.command == 'grouped':
+        bench_grouped(args.rows, args.missing_rate)
+    elif args.command == 'make-stats':
+        _, seconds = _timed(make_stats_csv, args.out, args.rows, args.typo_rate, args.unknown_rate)
+        print(f"Wrote {args.rows:,} rows to {args.out} in {seconds:.1f}s")
+    elif args.command == 'make-gallery':
+        paths, seconds = _timed(make_gallery, args.out, args.photos, args.text_rate, args.duplicate_rate)
+        print(f"Wrote {len(paths)} photos to {args.out} in {seconds:.1f}s")
+    elif args.command == 'pipeline':
+        sys.exit(0 if bench_pipeline(args.rows, args.typo_rate, args.photos, args.text_rate, args.repeat,
+                                     args.workdir, args.baseline, args.update_baseline, args.threshold,
+                                     args.verbose) else 1)
+
+
+if __name__ == '__main__':
+    main()
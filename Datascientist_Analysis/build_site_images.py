@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Website Image Derivatives
+Builds right-sized AVIF/WebP/JPEG variants and LQIP placeholders for every
+photo under a media folder, plus manifest.json describing them. Only photos
+whose content changed since the last build are decoded again.
+
+Usage:
+    python build_site_images.py ../web/public/media
+    python build_site_images.py ../web/public/media --out ../web/public/media/_derived --workers 0
+"""
+
+import argparse
+import os
+
+from image_derivatives import derivatives_exist, load_manifest, manifest_key, save_manifest
+from image_ingest import file_content_hash, find_images, iter_ingest
+
+
+def build_site_images(source_root: str, output_dir: str, workers: int = 1) -> dict:
+    """Refresh the derivative cache for source_root; returns counts of what was done."""
+    output_dir = os.path.abspath(output_dir)
+    sources = find_images(source_root, skip_dirs=[output_dir])
+    manifest = load_manifest(output_dir)
+
+    entries = {}
+    changed = []
+    for path in sources:
+        rel = manifest_key(path, source_root)
+        entry = manifest.get(rel)
+        if entry and entry['sha256'] == file_content_hash(path) and derivatives_exist(entry, output_dir):
+            entries[rel] = entry
+        else:
+            changed.append(path)
+
+    for record in iter_ingest(changed, workers=workers or os.cpu_count() or 1, ocr=False,
+                              derivatives_dir=output_dir, derivatives_root=source_root):
+        if record.get('error'):
+            print(f"  ! {record['path']}: {record['error']}")
+            continue
+        entries[manifest_key(record['path'], source_root)] = record['derivatives']
+
+    save_manifest(output_dir, entries)
+    return {'sources': len(sources), 'regenerated': len(changed), 'unchanged': len(sources) - len(changed),
+            'removed': len(set(manifest) - set(entries))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source_root', help='folder of original photos (searched recursively)')
+    parser.add_argument('--out', help='derivative folder (default: <source_root>/_derived)')
+    parser.add_argument('--workers', type=int, default=1, help='decode/encode processes (0 = all cores)')
+    args = parser.parse_args()
+
+    output_dir = args.out or os.path.join(args.source_root, '_derived')
+    counts = build_site_images(args.source_root, output_dir, args.workers)
+    print(f"{counts['sources']} photos: {counts['regenerated']} regenerated, {counts['unchanged']} unchanged, "
+          f"{counts['removed']} removed -> {os.path.join(output_dir, 'manifest.json')}")
+
+
+if __name__ == '__main__':
+    main()
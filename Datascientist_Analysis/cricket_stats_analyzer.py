@@ -6,26 +6,45 @@ Analyzes cricket stats with whitelist filtering, Top-5 leaderboards, and player
 
 import os
 import sys
+import json
+import hashlib
+import shutil
 import warnings
-from pathlib import Path
+from functools import lru_cache
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Iterator
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
-from PIL import Image, ExifTags
+from PIL import Image
 from rapidfuzz import fuzz, process
 import re
+import io
 
-# Optional OCR support
+from ocr_gate import OCR_GATE_MODES, OCRGateStats
+from image_ingest import TESSERACT_AVAILABLE, IngestCache, find_images, iter_ingest
+from image_derivatives import manifest_key, update_manifest
+from photo_index import OCR_MATCH_THRESHOLD, PlayerPhotoMatcher
+from stage_graph import StageGraph
+from instrumentation import add_count, end_run, instrumented, start_run
+
+# Optional OCR support (pytesseract and the tesseract binary)
+if not TESSERACT_AVAILABLE:
+    warnings.warn("pytesseract or tesseract not available. Photo OCR will be skipped.")
+
+# Optional columnar frame cache support
 try:
-    import pytesseract
-    TESSERACT_AVAILABLE = True
+    import pyarrow  # noqa: F401  (pandas Parquet engine)
+    PYARROW_AVAILABLE = True
 except ImportError:
-    TESSERACT_AVAILABLE = False
-    warnings.warn("pytesseract not available. Photo OCR will be skipped.")
+    PYARROW_AVAILABLE = False
+    warnings.warn("pyarrow not available. Parquet frame cache will be skipped.")
 
 # =============================================================================
 # RUNTIME VARIABLES (EDIT BEFORE RUNNING)
@@ -33,7 +52,19 @@ except ImportError:
 
 STATS_CSV_PATH = "stats.csv"  # Path to your cricket stats CSV
 IMAGES_DIR = ""  # Path to photos directory or leave empty
+OCR_GATE = "recall"  # Skip OCR on photos unlikely to hold text: "off", "recall", "balanced" or "speed"
 OUTPUT_DIR = "./outputs"
+STREAMING_CHUNK_SIZE = None  # Rows per chunk for very large CSVs (None = load whole file)
+NAME_CACHE_PATH = os.path.join(OUTPUT_DIR, "name_cache.json")  # Raw name -> canonical cache ("" to disable)
+FRAME_CACHE_DIR = os.path.join(OUTPUT_DIR, "frame_cache")  # Parquet cache of processed frames ("" to disable)
+INCREMENTAL_STATE_PATH = ""  # Running per-player totals for append-only CSVs ("" = full recompute)
+INCREMENTAL_WATERMARK = "offset"  # "offset" (fold bytes appended since last run) or "date" (rows after last date)
+PHOTO_CACHE_PATH = os.path.join(OUTPUT_DIR, "image_ingest_cache.sqlite")  # Photo ingestion cache, shareable with the photo analytics script ("" to disable)
+PHOTO_WORKERS = 1  # Processes for photo decoding and OCR (1 = in-process, 0 = all cores)
+PHOTO_INDEX_PATH = os.path.join(OUTPUT_DIR, "photo_players.json")  # Player <-> photo map, reused for unchanged photos ("" to disable)
+SITE_IMAGES_DIR = ""  # Website image variants + manifest.json, written in the same decode as photo analysis ("" = off)
+METRICS_PATH = os.path.join(OUTPUT_DIR, "run_metrics.json")  # Per-stage wall/CPU time, peak RSS and item counts ("" to disable)
+PROFILE_PATH = ""  # Whole-run profile: .prof (cProfile) or .html (pyinstrument); runs stages in order ("" = off)
 
 # Canonical roster (whitelist only)
 PLAYERS_WHITELIST = [
@@ -58,6 +89,44 @@ MIN_OVERS_FOR_ECON = 10
 MIN_WICKETS_FOR_BOWL_AVG = 5
 FUZZY_MATCH_THRESHOLD = 90
 SEED = 7
+CHART_WORKERS = 1  # Processes for chart rendering (1 = in-process, 0 = all cores)
+CHART_CACHE = True  # Skip charts whose plotted data and style are unchanged on disk
+TOP_K = 5  # Leaderboard size (5, 10, 50, ...); output files keep the top5_ prefix
+GROUPED_LEADERBOARD_DIMENSIONS = []  # Extra boards per slice, e.g. ['season', 'opponent', 'venue']
+PIPELINE_CONCURRENT = True  # Run independent pipeline stages side by side (False = one at a time, in order)
+PIPELINE_PROCESSES = 1  # Processes for CPU-bound pipeline stages (1 = threads in this process, 0 = all cores)
+
+# Fuzzy matching performance
+FUZZY_BATCH_MATCHING = True  # Score all new names against the whitelist as one matrix
+FUZZY_MATCH_WORKERS = -1  # Threads for batch matching (-1 = all cores)
+FUZZY_BATCH_MAX_CELLS = 10_000_000  # Names x whitelist scores held in memory per block
+FUZZY_BLOCKING_MIN_WHITELIST = 1000  # Use the blocking index for whitelists at least this large
+
+# Derived ratio metrics: (column, numerator, denominator, scale).
+# Each is computed column-wise as numerator * scale / denominator, NaN when the
+# denominator is 0 or either side is missing. Add rows here for new metrics.
+RATIO_METRICS = [
+    ('avg', 'runs', 'dismissals', 1),
+    ('sr', 'runs', 'balls', 100),
+    ('economy', 'runs_conceded', 'overs', 1),
+    ('avg_bowl', 'runs_conceded', 'wickets', 1),
+    ('strike_rate_bowl', 'balls_bowled', 'wickets', 1),
+]
+
+# Leaderboards: (key, column, display name, ascending, min value, min column).
+# Ties on the metric are broken by player name, A-Z. If nobody meets the
+# minimum, the minimum is relaxed for that board.
+LEADERBOARD_METRICS = [
+    ('batting_runs', 'runs', 'Runs', False, None, None),
+    ('batting_avg', 'avg', 'Batting Average', False, MIN_INNINGS_FOR_BAT_AVG, 'innings'),
+    ('batting_sr', 'sr', 'Strike Rate', False, MIN_BALLS_FOR_SR, 'balls'),
+    ('batting_boundaries', 'boundaries', 'Boundaries', False, None, None),
+    ('batting_highest', 'highest', 'Highest Score', False, None, None),
+    ('bowling_wickets', 'wickets', 'Wickets', False, None, None),
+    ('bowling_avg_bowl', 'avg_bowl', 'Bowling Average', True, MIN_WICKETS_FOR_BOWL_AVG, 'wickets'),
+    ('bowling_economy', 'economy', 'Economy Rate', True, MIN_OVERS_FOR_ECON, 'overs'),
+    ('fielding_dismissals', 'dismissals_field', 'Fielding Dismissals', False, None, None),
+]
 
 # =============================================================================
 # SETUP
@@ -66,17 +135,18 @@ SEED = 7
 np.random.seed(SEED)
 warnings.filterwarnings('ignore')
 
-# Setup logging
+# Setup logging (not in pool workers, which would otherwise truncate logs.txt on spawn)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 log_file = os.path.join(OUTPUT_DIR, 'logs.txt')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file, mode='w'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+if multiprocessing.parent_process() is None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, mode='w'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
 logger = logging.getLogger(__name__)
 
 # =============================================================================
@@ -90,6 +160,24 @@ def safe_divide(numerator, denominator, default=np.nan):
     return numerator / denominator
 
 
+def safe_divide_columns(numerator, denominator, scale=1, default=np.nan) -> np.ndarray:
+    """Column-wise safe_divide: same NaN/zero semantics, one NumPy pass per metric."""
+    num = np.asarray(numerator, dtype=float) * scale
+    den = np.asarray(denominator, dtype=float)
+    valid = ~np.isnan(num) & ~np.isnan(den) & (den != 0)
+    result = np.full(num.shape, default, dtype=float)
+    np.divide(num, den, out=result, where=valid)
+    return result
+
+
+def apply_ratio_metrics(df: pd.DataFrame, metrics: List[Tuple[str, str, str, float]] = None) -> pd.DataFrame:
+    """Add every ratio metric whose numerator and denominator columns are present."""
+    for name, num_col, den_col, scale in (metrics or RATIO_METRICS):
+        if num_col in df.columns and den_col in df.columns:
+            df[name] = safe_divide_columns(df[num_col], df[den_col], scale)
+    return df
+
+
 def normalize_name(name):
     """Normalize player name: strip, title case, collapse spaces."""
     if pd.isna(name):
@@ -116,19 +204,8 @@ def apply_typo_fixes(name):
 # CORE FUNCTIONS
 # =============================================================================
 
-def load_data(csv_path: str) -> pd.DataFrame:
-    """Load and perform initial standardization of CSV data."""
-    logger.info(f"Loading data from: {csv_path}")
-    
-    if not os.path.exists(csv_path):
-        logger.error(f"CSV file not found: {csv_path}")
-        raise FileNotFoundError(f"CSV file not found: {csv_path}")
-    
-    df = pd.read_csv(csv_path)
-    logger.info(f"Loaded {len(df)} rows, {len(df.columns)} columns")
-    logger.info(f"Columns found: {list(df.columns)}")
-    
-    # Check for player column
+def _standardize_player_column(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename the first recognised player-name column to 'player'."""
     player_col = None
     for col in ['player', 'Player', 'name', 'Name']:
         if col in df.columns:
@@ -145,6 +222,35 @@ def load_data(csv_path: str) -> pd.DataFrame:
     return df
 
 
+@instrumented(items=lambda df, *args, **kwargs: {'rows': len(df)})
+def load_data(csv_path: str) -> pd.DataFrame:
+    """Load and perform initial standardization of CSV data."""
+    logger.info(f"Loading data from: {csv_path}")
+    
+    if not os.path.exists(csv_path):
+        logger.error(f"CSV file not found: {csv_path}")
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    
+    df = pd.read_csv(csv_path)
+    logger.info(f"Loaded {len(df)} rows, {len(df.columns)} columns")
+    logger.info(f"Columns found: {list(df.columns)}")
+    
+    return _standardize_player_column(df)
+
+
+def load_data_chunks(csv_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Stream the CSV in chunks of chunk_size rows, standardizing each one."""
+    logger.info(f"Streaming data from: {csv_path} ({chunk_size} rows per chunk)")
+    
+    if not os.path.exists(csv_path):
+        logger.error(f"CSV file not found: {csv_path}")
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        yield _standardize_player_column(chunk)
+
+
+@instrumented(items=lambda df, *args, **kwargs: {'rows': len(df)})
 def normalize_names(df: pd.DataFrame) -> pd.DataFrame:
     """Normalize and fix player names."""
     logger.info("Normalizing player names...")
@@ -156,28 +262,211 @@ def normalize_names(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def apply_whitelist_fuzzy(df: pd.DataFrame, whitelist: List[str], threshold: int = 90) -> pd.DataFrame:
-    """Fuzzy match player names to whitelist and filter."""
+def soundex(word: str) -> str:
+    """American Soundex code (letter + 3 digits) used as a phonetic blocking key."""
+    codes = {c: d for d, letters in enumerate(['aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r'])
+             for c in letters}
+    letters = [c for c in word.lower() if c in codes]
+    if not letters:
+        return word.lower()
+    
+    result = letters[0].upper()
+    prev = codes[letters[0]]
+    for c in letters[1:]:
+        code = codes[c]
+        if code != 0 and code != prev:
+            result += str(code)
+        if c not in 'hw':
+            prev = code
+    return (result + '000')[:4]
+
+
+def blocking_keys(name: str) -> List[str]:
+    """Surname token, first initial + surname phonetic code, and first-name phonetic + surname initial."""
+    tokens = re.findall(r'[a-z0-9]+', name.lower())
+    if not tokens:
+        return []
+    first, surname = tokens[0], tokens[-1]
+    return [
+        f"s:{surname}",
+        f"ip:{first[0]}{soundex(surname)}",
+        f"pi:{soundex(first)}{surname[0]}",
+    ]
+
+
+@lru_cache(maxsize=4)
+def build_blocking_index(whitelist: Tuple[str, ...]) -> Dict[str, List[int]]:
+    """Bucket whitelist positions by blocking key; built once per whitelist."""
+    index = {}
+    for i, canonical in enumerate(whitelist):
+        for key in blocking_keys(canonical):
+            index.setdefault(key, []).append(i)
+    logger.info(f"Built blocking index: {len(index)} blocks over {len(whitelist)} names")
+    return index
+
+
+def use_blocking(whitelist: List[str]) -> bool:
+    """Blocking only pays off (and only trades recall) on large whitelists."""
+    return len(whitelist) >= FUZZY_BLOCKING_MIN_WHITELIST
+
+
+def name_cache_key(whitelist: List[str], threshold: int) -> str:
+    """Hash of everything a cached name resolution depends on."""
+    payload = json.dumps({'whitelist': list(whitelist), 'threshold': threshold, 'scorer': 'fuzz.ratio',
+                          'blocking': use_blocking(whitelist)})
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_name_cache(cache_path: str, whitelist: List[str], threshold: int) -> Dict[str, list]:
+    """Load raw name -> [best whitelist match, score] aliases, or {} if stale/missing."""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable name cache {cache_path}: {e}")
+        return {}
+    
+    if cache.get('key') != name_cache_key(whitelist, threshold):
+        logger.info("Name cache invalidated (whitelist or threshold changed)")
+        return {}
+    
+    aliases = cache.get('aliases', {})
+    logger.info(f"Loaded {len(aliases)} cached name resolutions from {cache_path}")
+    return aliases
+
+
+def save_name_cache(cache_path: str, whitelist: List[str], threshold: int, aliases: Dict[str, list]):
+    """Atomically write the alias cache next to the other outputs."""
+    if not cache_path:
+        return
+    
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'key': name_cache_key(whitelist, threshold), 'aliases': aliases}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+    logger.info(f"Saved {len(aliases)} cached name resolutions to {cache_path}")
+
+
+def match_names_blocked(names: List[str], whitelist: List[str],
+                        min_score: float = 0) -> Tuple[Dict[str, list], List[str]]:
+    """
+    Score each name only against whitelist entries sharing a blocking key.
+    
+    Returns the matches found plus the names that need the full scan: those
+    whose blocks were all empty or whose best in-block score is below min_score.
+    """
+    index = build_blocking_index(tuple(whitelist))
+    matches = {}
+    fallback = []
+    
+    for player in names:
+        candidates = sorted({i for key in blocking_keys(player) for i in index.get(key, [])})
+        if not candidates:
+            fallback.append(player)
+            continue
+        
+        # Candidates stay in whitelist order, so ties resolve as in the full scan
+        match = process.extractOne(player, [whitelist[i] for i in candidates], scorer=fuzz.ratio)
+        if match[1] < min_score:
+            fallback.append(player)
+        else:
+            matches[player] = [match[0], match[1]]
+    
+    return matches, fallback
+
+
+def match_names(names: List[str], whitelist: List[str], batch: bool = None,
+                workers: int = None, blocking: bool = None, threshold: float = 0) -> Dict[str, list]:
+    """
+    Best whitelist candidate and score for each name (no thresholding).
+    
+    Batch mode scores names x whitelist with rapidfuzz.process.cdist across
+    worker threads, in row blocks of at most FUZZY_BATCH_MAX_CELLS scores. It
+    returns exactly what process.extractOne would, including the first-in-
+    whitelist tie-break.
+    
+    With blocking (default for whitelists of FUZZY_BLOCKING_MIN_WHITELIST or
+    more) names are first scored against their candidate block only, and fall
+    back to the full scan when no block matches or nothing in the block
+    reaches threshold.
+    """
+    batch = FUZZY_BATCH_MATCHING if batch is None else batch
+    workers = FUZZY_MATCH_WORKERS if workers is None else workers
+    blocking = use_blocking(whitelist) if blocking is None else blocking
+    matches = {}
+    
+    if not names or not whitelist:
+        return {player: [None, 0] for player in names}
+    
+    if blocking:
+        matches, names = match_names_blocked(names, whitelist, threshold)
+        if names:
+            logger.info(f"Blocking index: {len(matches)} names matched within blocks, "
+                        f"{len(names)} fell back to full scan")
+        if not names:
+            return matches
+    
+    if not batch:
+        for player in names:
+            match = process.extractOne(player, whitelist, scorer=fuzz.ratio)
+            matches[player] = [match[0], match[1]] if match else [None, 0]
+        return matches
+    
+    block = max(1, FUZZY_BATCH_MAX_CELLS // len(whitelist))
+    for start in range(0, len(names), block):
+        block_names = names[start:start + block]
+        scores = process.cdist(block_names, whitelist, scorer=fuzz.ratio,
+                               dtype=np.float64, workers=workers)
+        best_idx = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(block_names)), best_idx]
+        for player, idx, score in zip(block_names, best_idx, best_scores):
+            matches[player] = [whitelist[idx], float(score)]
+    return matches
+
+
+@instrumented(items=lambda df, *args, **kwargs: {'rows': len(df)})
+def apply_whitelist_fuzzy(df: pd.DataFrame, whitelist: List[str], threshold: int = 90,
+                          alias_cache: Optional[Dict[str, list]] = None) -> pd.DataFrame:
+    """
+    Fuzzy match player names to whitelist and filter.
+    
+    alias_cache (see load_name_cache) is consulted before rapidfuzz and updated
+    in place with every newly scored spelling.
+    """
     logger.info(f"Applying fuzzy matching with threshold {threshold}...")
     
     canonical_map = {}
     unmatched = []
     
-    for player in df['player'].unique():
-        if not player:
-            continue
-        
+    players = [p for p in df['player'].unique() if p]
+    whitelist_set = set(whitelist)
+    cache = alias_cache if alias_cache is not None else {}
+    
+    # Only spellings never seen before reach rapidfuzz
+    misses = [p for p in players if p not in whitelist_set and p not in cache]
+    add_count('names', len(players))
+    add_count('names_scored', len(misses))
+    cache.update(match_names(misses, whitelist, threshold=threshold))
+    
+    if alias_cache is not None:
+        hits = len(players) - len(misses) - sum(p in whitelist_set for p in players)
+        logger.info(f"Name cache: {hits} hits, {len(misses)} misses")
+    
+    for player in players:
         # Try exact match first
-        if player in whitelist:
+        if player in whitelist_set:
             canonical_map[player] = player
             continue
         
         # Fuzzy match
-        match = process.extractOne(player, whitelist, scorer=fuzz.ratio)
-        if match and match[1] >= threshold:
-            canonical_map[player] = match[0]
-            if match[1] < 100:
-                logger.info(f"Fuzzy matched '{player}' -> '{match[0]}' (score: {match[1]})")
+        best, score = cache[player]
+        if best is not None and score >= threshold:
+            canonical_map[player] = best
+            if score < 100:
+                logger.info(f"Fuzzy matched '{player}' -> '{best}' (score: {score})")
         else:
             unmatched.append(player)
     
@@ -198,6 +487,7 @@ def apply_whitelist_fuzzy(df: pd.DataFrame, whitelist: List[str], threshold: int
     return df
 
 
+@instrumented(items=lambda df, *args, **kwargs: {'rows': len(df)})
 def engineer_metrics(df: pd.DataFrame) -> pd.DataFrame:
     """Compute derived metrics with safe type coercion."""
     logger.info("Engineering metrics...")
@@ -219,8 +509,6 @@ def engineer_metrics(df: pd.DataFrame) -> pd.DataFrame:
     
     # Batting metrics
     df['dismissals'] = (df['innings'] - df['not_outs']).clip(lower=0)
-    df['avg'] = df.apply(lambda x: safe_divide(x['runs'], x['dismissals']), axis=1)
-    df['sr'] = df.apply(lambda x: safe_divide(x['runs'] * 100, x['balls']), axis=1)
     df['boundaries'] = df['fours'] + df['sixes']
     
     # Bowling metrics
@@ -228,151 +516,531 @@ def engineer_metrics(df: pd.DataFrame) -> pd.DataFrame:
         df['balls_bowled'] = df['overs'] * 6
         logger.info("Estimated balls_bowled from overs")
     
-    df['economy'] = df.apply(lambda x: safe_divide(x['runs_conceded'], x['overs']), axis=1)
-    df['avg_bowl'] = df.apply(lambda x: safe_divide(x['runs_conceded'], x['wickets']), axis=1)
-    df['strike_rate_bowl'] = df.apply(lambda x: safe_divide(x['balls_bowled'], x['wickets']), axis=1)
-    
     # Fielding metrics
     df['dismissals_field'] = df['catches'] + df['stumpings'] + df['run_outs']
     
+    # Ratio metrics (avg, sr, economy, avg_bowl, strike_rate_bowl)
+    df = apply_ratio_metrics(df)
+    
     logger.info("Metrics computed successfully")
     return df
 
 
-def aggregate_player_stats(df: pd.DataFrame) -> pd.DataFrame:
-    """Aggregate stats per player."""
-    logger.info("Aggregating player statistics...")
-    
-    agg_dict = {
-        'matches': 'sum',
-        'innings': 'sum',
-        'runs': 'sum',
-        'balls': 'sum',
-        'fours': 'sum',
-        'sixes': 'sum',
-        'highest': 'max',
-        'not_outs': 'sum',
-        'wickets': 'sum',
-        'overs': 'sum',
-        'maidens': 'sum',
-        'runs_conceded': 'sum',
-        'dots': 'sum',
-        'catches': 'sum',
-        'stumpings': 'sum',
-        'run_outs': 'sum',
-        'boundaries': 'sum',
-        'dismissals_field': 'sum',
-    }
-    
+PLAYER_AGGREGATIONS = {
+    'matches': 'sum',
+    'innings': 'sum',
+    'runs': 'sum',
+    'balls': 'sum',
+    'fours': 'sum',
+    'sixes': 'sum',
+    'highest': 'max',
+    'not_outs': 'sum',
+    'wickets': 'sum',
+    'overs': 'sum',
+    'maidens': 'sum',
+    'runs_conceded': 'sum',
+    'dots': 'sum',
+    'catches': 'sum',
+    'stumpings': 'sum',
+    'run_outs': 'sum',
+    'boundaries': 'sum',
+    'dismissals_field': 'sum',
+}
+
+
+def sum_player_stats(df: pd.DataFrame, partial: Optional[pd.DataFrame] = None,
+                     keys: List[str] = None, dropna: bool = True) -> pd.DataFrame:
+    """
+    Group raw rows into per-player (or per keys) totals, optionally folding in
+    earlier partial totals. dropna=False keeps groups with missing keys.
+    """
+    keys = keys or ['canonical_player']
     # Filter to only columns that exist
-    agg_dict = {k: v for k, v in agg_dict.items() if k in df.columns}
+    agg_dict = {k: v for k, v in PLAYER_AGGREGATIONS.items() if k in df.columns}
     
-    player_stats = df.groupby('canonical_player').agg(agg_dict).reset_index()
+    totals = df.groupby(keys, dropna=dropna).agg(agg_dict).reset_index()
+    if partial is None or len(partial) == 0:
+        return totals
+    if len(totals) == 0:
+        return partial
     
-    # Recalculate derived metrics on aggregated data
+    # Sums of sums and max of maxes are exact, so partials can be merged in any order
+    return pd.concat([partial, totals], ignore_index=True).groupby(keys, dropna=dropna).agg(agg_dict).reset_index()
+
+
+def finalize_player_stats(player_stats: pd.DataFrame) -> pd.DataFrame:
+    """Recalculate derived metrics on aggregated totals."""
+    # (balls_bowled is not aggregated, so strike_rate_bowl stays row-level only)
     player_stats['dismissals'] = (player_stats['innings'] - player_stats['not_outs']).clip(lower=0)
-    player_stats['avg'] = player_stats.apply(lambda x: safe_divide(x['runs'], x['dismissals']), axis=1)
-    player_stats['sr'] = player_stats.apply(lambda x: safe_divide(x['runs'] * 100, x['balls']), axis=1)
-    player_stats['economy'] = player_stats.apply(lambda x: safe_divide(x['runs_conceded'], x['overs']), axis=1)
-    player_stats['avg_bowl'] = player_stats.apply(lambda x: safe_divide(x['runs_conceded'], x['wickets']), axis=1)
+    player_stats = apply_ratio_metrics(player_stats)
     
     logger.info(f"Aggregated stats for {len(player_stats)} players")
     return player_stats
 
 
-def build_top5(player_stats: pd.DataFrame) -> Dict[str, pd.DataFrame]:
-    """Build Top-5 leaderboards for each metric."""
-    logger.info("Building Top-5 leaderboards...")
+@instrumented(items=lambda player_stats, df: {'rows': len(df), 'players': len(player_stats)})
+def aggregate_player_stats(df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate stats per player."""
+    logger.info("Aggregating player statistics...")
+    return finalize_player_stats(sum_player_stats(df))
+
+
+def add_season_column(df: pd.DataFrame) -> pd.DataFrame:
+    """Derive 'season' (calendar year of 'date') unless the CSV already has one."""
+    if 'season' not in df.columns and 'date' in df.columns:
+        df['season'] = pd.to_datetime(df['date'], errors='coerce').dt.year.astype('Int64')
+    return df
+
+
+@instrumented(items=lambda rollups, df, dimensions: {'rows': len(df)})
+def aggregate_grouped_stats(df: pd.DataFrame, dimensions: List[str]) -> Dict[str, pd.DataFrame]:
+    """
+    Per-slice player stats for each dimension from a single grouped reduction.
     
-    top5_dict = {}
+    Raw rows are reduced once into a player x dimension cube; every dimension's
+    rollup is then re-grouped from the (much smaller) cube rather than the rows.
+    The cube keeps cells with missing keys, so a row without a venue still
+    counts towards its season and opponent; each rollup drops only its own
+    missing values, exactly as a direct groupby on that dimension would.
+    """
+    logger.info(f"Aggregating grouped statistics by {dimensions}...")
     
-    # Batting leaderboards
-    batting_metrics = [
-        ('runs', 'Runs', False, None, None),
-        ('avg', 'Batting Average', False, MIN_INNINGS_FOR_BAT_AVG, 'innings'),
-        ('sr', 'Strike Rate', False, MIN_BALLS_FOR_SR, 'balls'),
-        ('boundaries', 'Boundaries', False, None, None),
-        ('highest', 'Highest Score', False, None, None),
-    ]
+    if 'season' in dimensions:
+        df = add_season_column(df)
     
-    for col, name, ascending, min_val, min_col in batting_metrics:
-        if col not in player_stats.columns:
-            logger.warning(f"Metric '{col}' not available for leaderboard")
-            continue
+    dims = []
+    for dim in dimensions:
+        if dim in df.columns:
+            dims.append(dim)
+        else:
+            logger.warning(f"Column '{dim}' not found in data; skipping grouped leaderboards")
+    if not dims:
+        return {}
+    
+    cube = sum_player_stats(df, keys=['canonical_player'] + dims, dropna=False)
+    logger.info(f"Reduced {len(df)} rows to a {len(cube)}-cell player x {' x '.join(dims)} cube")
+    
+    rollups = {}
+    for dim in dims:
+        rollup = sum_player_stats(cube, keys=[dim, 'canonical_player'])
+        rollups[dim] = finalize_player_stats(rollup)
+    return rollups
+
+
+def build_grouped_leaderboards(rollups: Dict[str, pd.DataFrame],
+                               k: int = None) -> Dict[str, Dict[object, Dict[str, pd.DataFrame]]]:
+    """Top-K leaderboards for every slice of every dimension: {dim: {value: top5_dict}}."""
+    grouped = {}
+    for dim, stats in rollups.items():
+        grouped[dim] = {}
+        for value, slice_stats in stats.groupby(dim, sort=True):
+            grouped[dim][value] = build_top5(slice_stats.drop(columns=dim), k, verbose=False)
+        logger.info(f"Built leaderboards for {len(grouped[dim])} {dim} slices")
+    return grouped
+
+
+@instrumented(items=lambda result, *args, **kwargs: {'players': len(result[0])})
+def stream_player_stats(csv_path: str, chunk_size: int, whitelist: List[str], threshold: int,
+                        keep_players: List[str],
+                        alias_cache: Optional[Dict[str, list]] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Chunked equivalent of load_data -> ... -> aggregate_player_stats.
+    
+    Only per-player partial totals and the raw rows of keep_players (needed for
+    spotlight sparklines) are held between chunks, so peak memory is bounded by
+    chunk_size plus roster size rather than file size.
+    """
+    logger.info("Aggregating player statistics (streaming)...")
+    
+    partial = None
+    kept_rows = []
+    total_rows = 0
+    
+    for chunk in load_data_chunks(csv_path, chunk_size):
+        total_rows += len(chunk)
+        add_count('rows', len(chunk))
+        chunk = normalize_names(chunk)
+        chunk = apply_whitelist_fuzzy(chunk, whitelist, threshold, alias_cache)
+        chunk = engineer_metrics(chunk)
         
-        df_filtered = player_stats.copy()
+        partial = sum_player_stats(chunk, partial)
+        kept_rows.append(chunk[chunk['canonical_player'].isin(keep_players)])
+    
+    if partial is None:
+        raise ValueError(f"No rows found in {csv_path}")
+    
+    logger.info(f"Streamed {total_rows} rows in chunks of {chunk_size}")
+    df_kept = pd.concat(kept_rows) if kept_rows else pd.DataFrame()
+    return finalize_player_stats(partial), df_kept
+
+
+def incremental_state_key(whitelist: List[str], threshold: int, spotlight_players: List[str],
+                          watermark: str) -> str:
+    """Hash of the configuration the running totals were built under."""
+    payload = json.dumps({
+        'names': name_cache_key(whitelist, threshold),
+        'aggregations': PLAYER_AGGREGATIONS,
+        'spotlight_players': list(spotlight_players),
+        'watermark': watermark,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load_incremental_state(state_path: str, key: str) -> Optional[Dict]:
+    """Load running totals, or None if missing, unreadable or built under another config."""
+    if not os.path.exists(state_path):
+        return None
+    
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable incremental state {state_path}: {e}")
+        return None
+    
+    if state.get('key') != key:
+        logger.info("Incremental state invalidated (whitelist, threshold or metrics changed)")
+        return None
+    return state
+
+
+def save_incremental_state(state_path: str, state: Dict):
+    """Atomically write the running totals and watermark."""
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp_path, state_path)
+    logger.info(f"Saved incremental state: {state_path} (watermark {state['watermark']})")
+
+
+def _prefix_digest(path: str, length: int, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the first length bytes of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while length > 0:
+            block = f.read(min(block_size, length))
+            if not block:
+                break
+            digest.update(block)
+            length -= len(block)
+    return digest.hexdigest()
+
+
+def read_rows_after_offset(csv_path: str, watermark: Optional[Dict]) -> Tuple[pd.DataFrame, Dict, bool]:
+    """
+    Parse only the complete lines appended after the byte-offset watermark.
+    
+    Returns (new rows, new watermark, resumed). resumed is False when there was
+    no usable watermark or the already-folded prefix has changed, in which case
+    every row is returned and the caller must start from empty totals.
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        start = len(header)
+        resumed = False
         
-        # Apply minimum threshold
-        if min_val and min_col:
-            df_filtered = df_filtered[df_filtered[min_col] >= min_val]
-            if len(df_filtered) == 0:
-                logger.warning(f"No players meet threshold for {name} ({min_col} >= {min_val}). Relaxing...")
-                df_filtered = player_stats.copy()
+        if watermark and watermark.get('mode') == 'offset':
+            offset = watermark['byte_offset']
+            if (os.path.getsize(csv_path) >= offset
+                    and _prefix_digest(csv_path, offset) == watermark['prefix_digest']):
+                start, resumed = offset, True
+            else:
+                logger.warning("Stats CSV was rewritten, not appended to. Rebuilding incremental totals...")
         
-        # Sort and get top 5
-        df_sorted = df_filtered.sort_values(
-            by=[col, 'canonical_player'], 
-            ascending=[ascending, True],
-            na_position='last'
-        )
-        df_sorted = df_sorted[df_sorted[col].notna()]
-        top5 = df_sorted.head(5)[['canonical_player', col]].copy()
-        top5['rank'] = range(1, len(top5) + 1)
-        top5_dict[f'batting_{col}'] = top5
+        f.seek(start)
+        appended = f.read()
+    
+    # Leave a trailing partial line (still being written) for the next run
+    appended = appended[:appended.rfind(b'\n') + 1]
+    end = start + len(appended)
+    
+    df = _standardize_player_column(pd.read_csv(io.BytesIO(header + appended)))
+    new_watermark = {'mode': 'offset', 'byte_offset': end, 'prefix_digest': _prefix_digest(csv_path, end)}
+    return df, new_watermark, resumed
+
+
+def read_rows_after_date(csv_path: str, watermark: Optional[Dict]) -> Tuple[pd.DataFrame, Dict, bool]:
+    """
+    Parse the CSV and keep rows not yet folded: those dated after the date
+    watermark, plus rows on the watermark date beyond the rows_at_date already
+    folded (matches added later the same day), plus undated rows beyond the
+    undated_rows already folded.
+    
+    Works for exports that are regenerated rather than appended, as long as new
+    matches never carry an earlier date and rows of one date, and undated rows,
+    keep their order.
+    """
+    df = load_data(csv_path)
+    if 'date' not in df.columns:
+        raise ValueError("INCREMENTAL_WATERMARK = 'date' requires a 'date' column")
+    
+    dates = pd.to_datetime(df['date'], errors='coerce')
+    resumed = bool(watermark and watermark.get('mode') == 'date' and watermark.get('date'))
+    undated = dates.isna()
+    new_rows = df
+    if resumed:
+        last = pd.Timestamp(watermark['date'])
+        on_last = dates == last
+        # States saved before these counts were recorded had folded every row of that date,
+        # and no undated rows after the rebuild
+        folded = watermark.get('rows_at_date', float('inf'))
+        folded_undated = watermark.get('undated_rows', float('inf'))
+        new_undated = undated & (undated.cumsum() > folded_undated)
+        new_rows = df[(dates > last) | (on_last & (on_last.cumsum() > folded)) | new_undated]
+        if new_undated.any():
+            logger.warning(f"Folding {int(new_undated.sum())} new rows with a missing or unparseable date")
+    
+    latest = dates.max()
+    last_date = latest.isoformat() if pd.notna(latest) else (watermark or {}).get('date')
+    rows_at_date = int((dates == pd.Timestamp(last_date)).sum()) if last_date else 0
+    new_watermark = {'mode': 'date', 'date': last_date, 'rows_at_date': rows_at_date,
+                     'undated_rows': int(undated.sum())}
+    return new_rows, new_watermark, resumed
+
+
+@instrumented(items=lambda result, *args, **kwargs: {'players': len(result[0])})
+def incremental_player_stats(csv_path: str, state_path: str, whitelist: List[str], threshold: int,
+                             spotlight_players: List[str],
+                             alias_cache: Optional[Dict[str, list]] = None,
+                             watermark_mode: str = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fold rows added since the last watermark into per-player running totals.
+    
+    The state file holds the sum_player_stats totals (sums, plus the running
+    max for 'highest'), the spotlight players' rows for sparklines, and the
+    watermark. Derived ratios are recomputed from the updated totals.
+    """
+    watermark_mode = watermark_mode or INCREMENTAL_WATERMARK
+    logger.info(f"Aggregating player statistics (incremental, by {watermark_mode})...")
+    
+    if not os.path.exists(csv_path):
+        logger.error(f"CSV file not found: {csv_path}")
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    
+    key = incremental_state_key(whitelist, threshold, spotlight_players, watermark_mode)
+    state = load_incremental_state(state_path, key)
+    watermark = state['watermark'] if state else None
+    
+    if watermark_mode == 'date':
+        new_rows, new_watermark, resumed = read_rows_after_date(csv_path, watermark)
+    else:
+        new_rows, new_watermark, resumed = read_rows_after_offset(csv_path, watermark)
+    
+    totals = pd.DataFrame(state['totals']) if resumed else None
+    spotlight_rows = pd.DataFrame(state['spotlight_rows']) if resumed else pd.DataFrame()
+    add_count('rows', len(new_rows))
+    logger.info(f"Folding {len(new_rows)} new rows into "
+                f"{'existing totals' if resumed else 'empty totals (full rebuild)'}")
+    
+    if len(new_rows) > 0:
+        new_rows = normalize_names(new_rows)
+        new_rows = apply_whitelist_fuzzy(new_rows, whitelist, threshold, alias_cache)
+        new_rows = engineer_metrics(new_rows)
+        totals = sum_player_stats(new_rows, totals)
         
-        logger.info(f"Top-5 {name}: {len(top5)} players")
+        spotlight_cols = [c for c in ['canonical_player', 'date', 'runs'] if c in new_rows.columns]
+        new_spotlight = new_rows.loc[new_rows['canonical_player'].isin(spotlight_players), spotlight_cols]
+        spotlight_rows = pd.concat([spotlight_rows, new_spotlight], ignore_index=True)
+    
+    if totals is None:
+        raise ValueError(f"No rows found in {csv_path}")
+    
+    save_incremental_state(state_path, {
+        'key': key,
+        'watermark': new_watermark,
+        'totals': totals.to_dict(orient='records'),
+        'spotlight_rows': spotlight_rows.to_dict(orient='records'),
+    })
+    
+    if 'canonical_player' not in spotlight_rows.columns:
+        spotlight_rows = pd.DataFrame(columns=['canonical_player', 'date', 'runs'])
+    return finalize_player_stats(totals.copy()), spotlight_rows
+
+
+def verify_incremental_state(csv_path: str, state_path: str, whitelist: List[str], threshold: int,
+                             spotlight_players: List[str], watermark_mode: str = None) -> bool:
+    """Compare the stored running totals against a full recompute of the CSV."""
+    watermark_mode = watermark_mode or INCREMENTAL_WATERMARK
+    logger.info(f"Verifying incremental state {state_path} against a full recompute...")
+    
+    state = load_incremental_state(state_path, incremental_state_key(whitelist, threshold,
+                                                                     spotlight_players, watermark_mode))
+    if state is None:
+        logger.error("No usable incremental state to verify")
+        return False
+    
+    incremental = finalize_player_stats(pd.DataFrame(state['totals']))
+    df = load_data(csv_path)
+    df = normalize_names(df)
+    df = apply_whitelist_fuzzy(df, whitelist, threshold)
+    df = engineer_metrics(df)
+    full = aggregate_player_stats(df)
+    
+    if list(incremental['canonical_player']) != list(full['canonical_player']):
+        logger.error(f"Player sets differ: incremental {list(incremental['canonical_player'])}, "
+                     f"full {list(full['canonical_player'])}")
+        return False
+    
+    ok = True
+    for col in full.columns:
+        if col == 'canonical_player':
+            continue
+        if col not in incremental.columns:
+            logger.error(f"Column '{col}' missing from incremental totals")
+            ok = False
+            continue
+        # Fractional columns (overs) may differ in the last bit from summation order
+        same = np.isclose(incremental[col].to_numpy(dtype=float), full[col].to_numpy(dtype=float),
+                          rtol=1e-9, atol=0, equal_nan=True)
+        if not same.all():
+            bad = list(full.loc[~same, 'canonical_player'])
+            logger.error(f"Column '{col}' differs for {bad}")
+            ok = False
+    
+    if ok:
+        logger.info(f"Incremental state matches full recompute ({len(full)} players)")
+    return ok
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def frame_cache_path(cache_root: str, csv_path: str, whitelist: List[str], threshold: int,
+                     spotlight_only: bool, spotlight_players: List[str]) -> Optional[str]:
+    """Content-addressed cache directory for this input file and configuration."""
+    if not cache_root or not PYARROW_AVAILABLE or not os.path.exists(csv_path):
+        return None
     
-    # Bowling leaderboards
-    bowling_metrics = [
-        ('wickets', 'Wickets', False, None, None),
-        ('avg_bowl', 'Bowling Average', True, MIN_WICKETS_FOR_BOWL_AVG, 'wickets'),
-        ('economy', 'Economy Rate', True, MIN_OVERS_FOR_ECON, 'overs'),
-    ]
+    config = json.dumps({
+        'names': name_cache_key(whitelist, threshold),
+        'ratio_metrics': RATIO_METRICS,
+        'aggregations': PLAYER_AGGREGATIONS,
+        # Streaming/incremental runs keep only spotlight rows, so the cached frame differs
+        'spotlight_only': spotlight_only,
+        'spotlight_players': list(spotlight_players) if spotlight_only else None,
+    }, sort_keys=True)
+    key = hashlib.sha256((file_digest(csv_path) + config).encode('utf-8')).hexdigest()
+    return os.path.join(cache_root, key[:32])
+
+
+def load_frame_cache(cache_path: Optional[str]) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Memory-map the cached engineered rows and player stats, if present."""
+    if not cache_path or not os.path.isdir(cache_path):
+        return None
+    
+    try:
+        df = pd.read_parquet(os.path.join(cache_path, 'engineered.parquet'), memory_map=True)
+        player_stats = pd.read_parquet(os.path.join(cache_path, 'player_stats.parquet'), memory_map=True)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable frame cache {cache_path}: {e}")
+        return None
+    
+    logger.info(f"Frame cache hit: {cache_path} ({len(df)} rows, {len(player_stats)} players)")
+    return df, player_stats
+
+
+def save_frame_cache(cache_path: Optional[str], df: pd.DataFrame, player_stats: pd.DataFrame):
+    """
+    Write both frames to a temp directory, then move it into place. A stale
+    or partial directory already at cache_path is moved aside and removed
+    first, since a directory rename cannot replace a non-empty one.
+    """
+    if not cache_path:
+        return
+    
+    tmp_path = f"{cache_path}.tmp{os.getpid()}"
+    stale_path = f"{cache_path}.old{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    try:
+        df.to_parquet(os.path.join(tmp_path, 'engineered.parquet'))
+        player_stats.to_parquet(os.path.join(tmp_path, 'player_stats.parquet'))
+        if os.path.isdir(cache_path):
+            os.replace(cache_path, stale_path)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Could not write frame cache {cache_path}: {e}")
+        return
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.rmtree(stale_path, ignore_errors=True)
+    logger.info(f"Saved frame cache: {cache_path}")
+
+
+def top_k_positions(values: np.ndarray, name_rank: np.ndarray, k: int, ascending: bool,
+                    mask: np.ndarray) -> np.ndarray:
+    """
+    Row positions of the k best values among mask, ties broken by name_rank.
+    
+    np.partition finds the k-th best value in O(n); only rows at or better
+    than it (including every row tied with it) are fully sorted.
+    """
+    candidates = np.flatnonzero(mask & ~np.isnan(values))
+    if len(candidates) == 0 or k <= 0:
+        return candidates[:0]
+    
+    keys = values[candidates] if ascending else -values[candidates]
+    if len(candidates) > k:
+        kth = np.partition(keys, k - 1)[k - 1]
+        keep = keys <= kth
+        candidates, keys = candidates[keep], keys[keep]
+    
+    order = np.lexsort((name_rank[candidates], keys))
+    return candidates[order[:k]]
+
+
+@instrumented(items=lambda top5_dict, *args, **kwargs: {'leaderboards': len(top5_dict)})
+def build_top5(player_stats: pd.DataFrame, k: int = None,
+               metrics: List[Tuple] = None, verbose: bool = True) -> Dict[str, pd.DataFrame]:
+    """Build Top-K leaderboards (default TOP_K) for every metric in LEADERBOARD_METRICS."""
+    k = TOP_K if k is None else k
+    if verbose:
+        logger.info(f"Building Top-{k} leaderboards...")
+    
+    top5_dict = {}
     
-    for col, name, ascending, min_val, min_col in bowling_metrics:
+    # Player-name order is shared by every board's tie-break
+    name_rank = np.empty(len(player_stats), dtype=np.int64)
+    name_rank[np.argsort(player_stats['canonical_player'].to_numpy(dtype=str), kind='stable')] = \
+        np.arange(len(player_stats))
+    all_rows = np.ones(len(player_stats), dtype=bool)
+    
+    for key, col, name, ascending, min_val, min_col in (metrics or LEADERBOARD_METRICS):
         if col not in player_stats.columns:
             logger.warning(f"Metric '{col}' not available for leaderboard")
             continue
         
-        df_filtered = player_stats.copy()
-        
+        # Apply minimum threshold
+        mask = all_rows
         if min_val and min_col:
-            df_filtered = df_filtered[df_filtered[min_col] >= min_val]
-            if len(df_filtered) == 0:
-                logger.warning(f"No players meet threshold for {name} ({min_col} >= {min_val}). Relaxing...")
-                df_filtered = player_stats.copy()
+            mask = (player_stats[min_col] >= min_val).to_numpy()
+            if not mask.any():
+                if verbose:
+                    logger.warning(f"No players meet threshold for {name} ({min_col} >= {min_val}). Relaxing...")
+                mask = all_rows
         
-        df_sorted = df_filtered.sort_values(
-            by=[col, 'canonical_player'],
-            ascending=[ascending, True],
-            na_position='last'
-        )
-        df_sorted = df_sorted[df_sorted[col].notna()]
-        top5 = df_sorted.head(5)[['canonical_player', col]].copy()
+        values = player_stats[col].to_numpy(dtype=float)
+        positions = top_k_positions(values, name_rank, k, ascending, mask)
+        top5 = player_stats.iloc[positions][['canonical_player', col]].copy()
         top5['rank'] = range(1, len(top5) + 1)
-        top5_dict[f'bowling_{col}'] = top5
+        top5_dict[key] = top5
         
-        logger.info(f"Top-5 {name}: {len(top5)} players")
-    
-    # Fielding leaderboard
-    if 'dismissals_field' in player_stats.columns:
-        df_sorted = player_stats.sort_values(
-            by=['dismissals_field', 'canonical_player'],
-            ascending=[False, True],
-            na_position='last'
-        )
-        df_sorted = df_sorted[df_sorted['dismissals_field'].notna()]
-        top5 = df_sorted.head(5)[['canonical_player', 'dismissals_field']].copy()
-        top5['rank'] = range(1, len(top5) + 1)
-        top5_dict['fielding_dismissals'] = top5
-        logger.info(f"Top-5 Fielding Dismissals: {len(top5)} players")
+        if verbose:
+            logger.info(f"Top-{k} {name}: {len(top5)} players")
     
     return top5_dict
 
 
+@instrumented(items=lambda spotlights, *args, **kwargs: {'players': len(spotlights)})
 def spotlight_report(player_stats: pd.DataFrame, top5_dict: Dict, 
-                    spotlight_players: List[str], df_raw: pd.DataFrame) -> Dict:
-    """Generate spotlight reports for specified players."""
+                    spotlight_players: List[str], df_raw: pd.DataFrame, k: int = None) -> Dict:
+    """Generate spotlight reports for specified players (k: the board size top5_dict was built with)."""
+    k = TOP_K if k is None else k
     logger.info(f"Generating spotlight reports for: {spotlight_players}")
     
     spotlights = {}
@@ -387,19 +1055,20 @@ def spotlight_report(player_stats: pd.DataFrame, top5_dict: Dict,
             'player': player,
             'stats': player_data.to_dict(),
             'ranks': {},
-            'margins': {}
+            'margins': {},
+            'top_k': k
         }
         
-        # Find ranks in each Top-5
+        # Find ranks in each Top-K board
         for metric_name, top5_df in top5_dict.items():
             if player in top5_df['canonical_player'].values:
                 rank = top5_df[top5_df['canonical_player'] == player]['rank'].values[0]
                 spotlight['ranks'][metric_name] = rank
             else:
-                # Find margin to #5
-                if len(top5_df) == 5:
+                # Find margin to the last place on the board
+                if len(top5_df) == k:
                     metric_col = [c for c in top5_df.columns if c not in ['canonical_player', 'rank']][0]
-                    fifth_value = top5_df.iloc[4][metric_col]
+                    fifth_value = top5_df.iloc[k - 1][metric_col]
                     player_value = player_data.get(metric_col.replace('batting_', '').replace('bowling_', '').replace('fielding_', ''))
                     
                     if pd.notna(player_value) and pd.notna(fifth_value):
@@ -424,58 +1093,144 @@ def spotlight_report(player_stats: pd.DataFrame, top5_dict: Dict,
     return spotlights
 
 
-def analyze_photos(images_dir: str, whitelist: List[str]) -> Optional[pd.DataFrame]:
-    """Analyze photos for player appearances using OCR and filename matching."""
+def photo_index_key(whitelist: List[str]) -> str:
+    """Hash of everything a stored photo -> players detection depends on."""
+    payload = json.dumps({'whitelist': list(whitelist), 'ocr_threshold': OCR_MATCH_THRESHOLD,
+                          'scorer': 'fuzz.partial_ratio', 'filename': 'token substring'})
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def photo_signature(filename: str, ocr_text: str) -> str:
+    """Changes whenever the inputs to player detection for a photo change."""
+    return hashlib.sha256(f"{filename}\0{ocr_text}".encode('utf-8')).hexdigest()
+
+
+def _read_photo_index(index_path: str, whitelist: List[str]) -> Dict:
+    """The stored photo index, or {} if stale/missing."""
+    if not index_path or not os.path.exists(index_path):
+        return {}
+    
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable photo index {index_path}: {e}")
+        return {}
+    
+    if index.get('key') != photo_index_key(whitelist):
+        logger.info("Photo index invalidated (whitelist or matching rules changed)")
+        return {}
+    return index
+
+
+def load_photo_index(index_path: str, whitelist: List[str]) -> Dict[str, Dict]:
+    """Load photo path -> {'signature', 'players'}, or {} if stale/missing."""
+    return _read_photo_index(index_path, whitelist).get('photos', {})
+
+
+def load_player_photos(index_path: str, whitelist: List[str]) -> Dict[str, List[str]]:
+    """Load the stored player -> photo paths map, or {} if stale/missing."""
+    return _read_photo_index(index_path, whitelist).get('players', {})
+
+
+def player_photos_of(player: str, index_path: str = None, whitelist: List[str] = None) -> List[str]:
+    """
+    Photo paths showing player, from the map the last analyze_photos run
+    stored at index_path (defaults to PHOTO_INDEX_PATH). The name is
+    matched against whitelist (defaults to PLAYERS_WHITELIST) the way stats
+    rows are, so a slight misspelling still finds the player.
+    """
+    whitelist = PLAYERS_WHITELIST if whitelist is None else whitelist
+    index_path = PHOTO_INDEX_PATH if index_path is None else index_path
+    match = process.extractOne(player, whitelist, scorer=fuzz.ratio, score_cutoff=FUZZY_MATCH_THRESHOLD)
+    return load_player_photos(index_path, whitelist).get(match[0], []) if match else []
+
+
+def save_photo_index(index_path: str, whitelist: List[str], photos: Dict[str, Dict],
+                     player_photos: Dict[str, List[str]]):
+    """Atomically write per-photo detections and the player -> photos map."""
+    if not index_path:
+        return
+    
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'key': photo_index_key(whitelist), 'players': player_photos, 'photos': photos},
+                  f, indent=1)
+    os.replace(tmp_path, index_path)
+
+
+@instrumented()
+def analyze_photos(images_dir: str, whitelist: List[str], ocr_gate: str = None,
+                   cache_path: str = None, workers: int = None,
+                   index_path: str = None, site_images_dir: str = None) -> Optional[pd.DataFrame]:
+    """Analyze photos for player appearances using OCR and filename matching.
+    
+    ocr_gate picks how aggressively photos without visible text skip OCR
+    (see ocr_gate.OCR_GATE_MODES); defaults to OCR_GATE. Photos are read
+    through image_ingest, with records cached at cache_path (defaults to
+    PHOTO_CACHE_PATH) on PHOTO_WORKERS processes unless workers is given.
+    
+    Players are found by a PlayerPhotoMatcher over the new or changed photos;
+    detections for the rest come from index_path (defaults to
+    PHOTO_INDEX_PATH). The player -> photo paths map is saved there too and
+    returned in df_images.attrs['player_photos'].
+    
+    With site_images_dir (defaults to SITE_IMAGES_DIR), website variants of
+    every photo are written from the decode the analysis already does, and
+    their entries merged into that folder's manifest.json (as
+    build_site_images.py would, without decoding the photos again).
+    """
     if not images_dir or not os.path.exists(images_dir):
         logger.info("No images directory provided or directory doesn't exist. Skipping photo analysis.")
         return None
     
     if not TESSERACT_AVAILABLE:
-        logger.warning("pytesseract not available. Skipping OCR analysis.")
+        logger.warning("pytesseract or tesseract not available. Skipping OCR analysis.")
+    
+    ocr_gate = OCR_GATE if ocr_gate is None else ocr_gate
+    if ocr_gate not in OCR_GATE_MODES:
+        raise ValueError(f"Unknown OCR_GATE '{ocr_gate}'. Choose from: {', '.join(OCR_GATE_MODES)}")
+    gate_stats = OCRGateStats(ocr_gate)
+    cache_path = PHOTO_CACHE_PATH if cache_path is None else cache_path
+    cache = IngestCache(cache_path) if cache_path else None
+    workers = PHOTO_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    site_images_dir = SITE_IMAGES_DIR if site_images_dir is None else site_images_dir
+    derivative_options = {'derivatives_dir': site_images_dir, 'derivatives_root': images_dir} if site_images_dir else {}
     
     logger.info(f"Analyzing photos in: {images_dir}")
     
     image_data = []
-    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp'}
-    
-    for root, _, files in os.walk(images_dir):
-        for filename in files:
-            if Path(filename).suffix.lower() not in image_extensions:
-                continue
-            
-            filepath = os.path.join(root, filename)
-            
-            try:
-                # Get timestamp
-                img = Image.open(filepath)
-                timestamp = None
-                
-                # Try EXIF data
-                if hasattr(img, '_getexif') and img._getexif():
-                    exif = {ExifTags.TAGS[k]: v for k, v in img._getexif().items() if k in ExifTags.TAGS}
-                    timestamp = exif.get('DateTime')
-                
-                # Fallback to file mtime
-                if not timestamp:
-                    timestamp = datetime.fromtimestamp(os.path.getmtime(filepath))
-                
-                # OCR text
-                ocr_text = ""
-                if TESSERACT_AVAILABLE:
-                    try:
-                        ocr_text = pytesseract.image_to_string(img)
-                    except Exception as e:
-                        logger.debug(f"OCR failed for {filename}: {e}")
-                
-                image_data.append({
-                    'filename': filename,
-                    'filepath': filepath,
-                    'timestamp': timestamp,
-                    'ocr_text': ocr_text
-                })
-                
-            except Exception as e:
-                logger.warning(f"Error processing {filename}: {e}")
+    derivatives = {}
+    for record in iter_ingest(find_images(images_dir, skip_dirs=[site_images_dir]), workers=workers, cache=cache,
+                              ocr_gate=ocr_gate, **derivative_options):
+        if record.get('error'):
+            logger.warning(f"Error processing {record['filename']}: {record['error']}")
+            continue
+        if record['ocr_status'] == 'failed':
+            logger.debug(f"OCR failed for {record['filename']}: {record['ocr_error']}")
+        if not record['cached'] and record['ocr_status'] != 'off':
+            gate_stats.record(record['ocr_status'] != 'skipped', record['ocr_seconds'], record['gate_seconds'])
+        if 'derivatives' in record:
+            derivatives[manifest_key(record['path'], images_dir)] = record['derivatives']
+        
+        image_data.append({
+            'filename': record['filename'],
+            'filepath': record['path'],
+            'timestamp': record['timestamp'],
+            'ocr_text': record['ocr_text']
+        })
+    
+    if cache:
+        logger.info(f"Photo cache: {cache.hits} reused, {cache.misses} ingested")
+        cache.close()
+    if site_images_dir:
+        update_manifest(site_images_dir, derivatives)
+        logger.info(f"Website image variants for {len(derivatives)} photos: {site_images_dir}")
+    
+    add_count('images', len(image_data))
+    add_count('ocr_calls', gate_stats.ocr_runs)
+    add_count('ocr_skipped', gate_stats.skipped)
     
     if not image_data:
         logger.info("No images found or processed")
@@ -483,38 +1238,42 @@ def analyze_photos(images_dir: str, whitelist: List[str]) -> Optional[pd.DataFra
     
     df_images = pd.DataFrame(image_data)
     
-    # Detect player names
-    def detect_players(row):
-        detected = []
-        filename_lower = row['filename'].lower()
-        ocr_lower = row['ocr_text'].lower()
-        
-        for player in whitelist:
-            player_lower = player.lower()
-            tokens = player_lower.split()
-            
-            # Check filename
-            if any(token in filename_lower for token in tokens if len(token) > 2):
-                detected.append(player)
-                continue
-            
-            # Check OCR with fuzzy matching
-            if row['ocr_text']:
-                match = process.extractOne(player, [row['ocr_text']], scorer=fuzz.partial_ratio)
-                if match and match[1] >= 70:
-                    detected.append(player)
-        
-        return detected
-    
-    df_images['detected_players'] = df_images.apply(detect_players, axis=1)
-    
-    # Count appearances
-    player_photo_counts = {}
-    for players in df_images['detected_players']:
+    # Detect player names: unchanged photos keep their stored players, the rest
+    # are matched against every player at once (one filename scan, one OCR cdist)
+    index_path = PHOTO_INDEX_PATH if index_path is None else index_path
+    stored = load_photo_index(index_path, whitelist)
+    photos = {}
+    matcher = PlayerPhotoMatcher()
+    indexed_paths = []
+    for row in image_data:
+        signature = photo_signature(row['filename'], row['ocr_text'])
+        entry = stored.get(row['filepath'])
+        if entry and entry['signature'] == signature:
+            photos[row['filepath']] = entry
+        else:
+            photos[row['filepath']] = {'signature': signature, 'players': []}
+            matcher.add(row['filename'], row['ocr_text'])
+            indexed_paths.append(row['filepath'])
+    for player, photo_ids in matcher.player_photos(whitelist).items():
+        for photo_id in photo_ids:
+            photos[indexed_paths[photo_id]]['players'].append(player)
+    logger.info(f"Photo index: {len(indexed_paths)} photos indexed, "
+                f"{len(photos) - len(indexed_paths)} reused from {index_path or 'memory'}")
+    
+    df_images['detected_players'] = [photos[path]['players'] for path in df_images['filepath']]
+    
+    # Player -> photos, in photo order
+    player_photos = {}
+    for path, players in zip(df_images['filepath'], df_images['detected_players']):
         for player in players:
-            player_photo_counts[player] = player_photo_counts.get(player, 0) + 1
+            player_photos.setdefault(player, []).append(path)
+    save_photo_index(index_path, whitelist, photos, player_photos)
+    df_images.attrs['player_photos'] = player_photos
+    player_photo_counts = {player: len(paths) for player, paths in player_photos.items()}
     
     logger.info(f"Analyzed {len(df_images)} images")
+    if gate_stats.ocr_runs or gate_stats.skipped:
+        logger.info(gate_stats.summary())
     logger.info(f"Player appearances: {player_photo_counts}")
     
     df_images['photo_count'] = df_images['detected_players'].apply(len)
@@ -522,100 +1281,200 @@ def analyze_photos(images_dir: str, whitelist: List[str]) -> Optional[pd.DataFra
     return df_images
 
 
-def render_charts(top5_dict: Dict, spotlights: Dict, output_dir: str):
-    """Render bar charts for Top-5 leaderboards and spotlight cards."""
-    logger.info("Rendering charts...")
+def render_top5_chart(metric_name: str, top5_df: pd.DataFrame, output_path: str,
+                      metadata: Optional[Dict[str, str]] = None):
+    """Draw and save one Top-K bar chart."""
+    metric_col = [c for c in top5_df.columns if c not in ['canonical_player', 'rank']][0]
     
-    plt.style.use('default')
+    fig, ax = plt.subplots(figsize=(10, 6))
+    
+    bars = ax.barh(top5_df['canonical_player'], top5_df[metric_col], color='steelblue')
+    
+    # Add value labels
+    for i, (player, value) in enumerate(zip(top5_df['canonical_player'], top5_df[metric_col])):
+        ax.text(value, i, f' {value:,.2f}', va='center', fontsize=10)
+    
+    ax.set_xlabel(metric_col.replace('_', ' ').title(), fontsize=12)
+    ax.set_title(f'Top-{len(top5_df)}: {metric_name.replace("_", " ").title()}', fontsize=14, fontweight='bold')
+    ax.invert_yaxis()
+    
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=150, bbox_inches='tight', metadata=metadata)
+    plt.close(fig)
+
+
+def render_spotlight_card(player: str, data: Dict, output_path: str,
+                          metadata: Optional[Dict[str, str]] = None):
+    """Draw and save one spotlight card (stats table, ranks, sparkline)."""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    
+    # Stats table
+    ax1.axis('tight')
+    ax1.axis('off')
+    
+    stats = data['stats']
+    table_data = [
+        ['Matches', f"{stats.get('matches', 0):.0f}"],
+        ['Runs', f"{stats.get('runs', 0):,.0f}"],
+        ['Average', f"{stats.get('avg', 0):.2f}"],
+        ['Strike Rate', f"{stats.get('sr', 0):.2f}"],
+        ['Wickets', f"{stats.get('wickets', 0):.0f}"],
+        ['Economy', f"{stats.get('economy', 0):.2f}"],
+        ['Catches', f"{stats.get('catches', 0):.0f}"],
+    ]
     
-    # Top-5 charts
+    table = ax1.table(cellText=table_data, cellLoc='left', loc='center',
+                     colWidths=[0.5, 0.3])
+    table.auto_set_font_size(False)
+    table.set_fontsize(11)
+    table.scale(1, 2)
+    
+    ax1.set_title(f'{player} - Statistics', fontsize=14, fontweight='bold', pad=20)
+    
+    # Ranks and sparkline
+    ax2.axis('off')
+    
+    k = data.get('top_k', TOP_K)
+    rank_text = f"{player}\n\n"
+    rank_text += f"Top-{k} Appearances:\n"
+    for metric, rank in sorted(data['ranks'].items()):
+        rank_text += f"  #{rank} in {metric.replace('_', ' ').title()}\n"
+    
+    if data['margins']:
+        rank_text += f"\nMargins to #{k}:\n"
+        for metric, margin_data in data['margins'].items():
+            rank_text += f"  {metric.replace('_', ' ').title()}: {abs(margin_data['margin']):.2f} {'behind' if margin_data['margin'] > 0 else 'ahead'}\n"
+    
+    ax2.text(0.1, 0.9, rank_text, fontsize=10, verticalalignment='top', 
+            family='monospace')
+    
+    # Sparkline
+    if data['sparkline'] and len(data['sparkline']) > 1:
+        ax_spark = fig.add_axes([0.6, 0.1, 0.35, 0.2])
+        ax_spark.plot(data['sparkline'], color='steelblue', linewidth=2)
+        ax_spark.fill_between(range(len(data['sparkline'])), data['sparkline'], alpha=0.3)
+        ax_spark.set_title('Runs per Match', fontsize=9)
+        ax_spark.set_xticks([])
+        ax_spark.spines['top'].set_visible(False)
+        ax_spark.spines['right'].set_visible(False)
+    
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=150, bbox_inches='tight', metadata=metadata)
+    plt.close(fig)
+
+
+def chart_tasks(top5_dict: Dict, spotlights: Dict, output_dir: str) -> List[Tuple]:
+    """One (kind, name, data, output_path) task per chart, in a fixed order."""
+    tasks = []
     for metric_name, top5_df in top5_dict.items():
         if len(top5_df) == 0:
             continue
-        
-        metric_col = [c for c in top5_df.columns if c not in ['canonical_player', 'rank']][0]
-        
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        bars = ax.barh(top5_df['canonical_player'], top5_df[metric_col], color='steelblue')
-        
-        # Add value labels
-        for i, (player, value) in enumerate(zip(top5_df['canonical_player'], top5_df[metric_col])):
-            ax.text(value, i, f' {value:,.2f}', va='center', fontsize=10)
-        
-        ax.set_xlabel(metric_col.replace('_', ' ').title(), fontsize=12)
-        ax.set_title(f'Top-5: {metric_name.replace("_", " ").title()}', fontsize=14, fontweight='bold')
-        ax.invert_yaxis()
-        
-        plt.tight_layout()
-        output_path = os.path.join(output_dir, f'top5_{metric_name}.png')
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        
-        logger.info(f"Saved chart: {output_path}")
+        tasks.append(('chart', metric_name, top5_df, os.path.join(output_dir, f'top5_{metric_name}.png')))
     
-    # Spotlight cards
     for player, data in spotlights.items():
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-        
-        # Stats table
-        ax1.axis('tight')
-        ax1.axis('off')
-        
-        stats = data['stats']
-        table_data = [
-            ['Matches', f"{stats.get('matches', 0):.0f}"],
-            ['Runs', f"{stats.get('runs', 0):,.0f}"],
-            ['Average', f"{stats.get('avg', 0):.2f}"],
-            ['Strike Rate', f"{stats.get('sr', 0):.2f}"],
-            ['Wickets', f"{stats.get('wickets', 0):.0f}"],
-            ['Economy', f"{stats.get('economy', 0):.2f}"],
-            ['Catches', f"{stats.get('catches', 0):.0f}"],
-        ]
-        
-        table = ax1.table(cellText=table_data, cellLoc='left', loc='center',
-                         colWidths=[0.5, 0.3])
-        table.auto_set_font_size(False)
-        table.set_fontsize(11)
-        table.scale(1, 2)
-        
-        ax1.set_title(f'{player} - Statistics', fontsize=14, fontweight='bold', pad=20)
-        
-        # Ranks and sparkline
-        ax2.axis('off')
-        
-        rank_text = f"{player}\n\n"
-        rank_text += "Top-5 Appearances:\n"
-        for metric, rank in sorted(data['ranks'].items()):
-            rank_text += f"  #{rank} in {metric.replace('_', ' ').title()}\n"
-        
-        if data['margins']:
-            rank_text += "\nMargins to #5:\n"
-            for metric, margin_data in data['margins'].items():
-                rank_text += f"  {metric.replace('_', ' ').title()}: {abs(margin_data['margin']):.2f} {'behind' if margin_data['margin'] > 0 else 'ahead'}\n"
-        
-        ax2.text(0.1, 0.9, rank_text, fontsize=10, verticalalignment='top', 
-                family='monospace')
-        
-        # Sparkline
-        if data['sparkline'] and len(data['sparkline']) > 1:
-            ax_spark = fig.add_axes([0.6, 0.1, 0.35, 0.2])
-            ax_spark.plot(data['sparkline'], color='steelblue', linewidth=2)
-            ax_spark.fill_between(range(len(data['sparkline'])), data['sparkline'], alpha=0.3)
-            ax_spark.set_title('Runs per Match', fontsize=9)
-            ax_spark.set_xticks([])
-            ax_spark.spines['top'].set_visible(False)
-            ax_spark.spines['right'].set_visible(False)
-        
-        plt.tight_layout()
         safe_name = player.lower().replace(' ', '_').replace('.', '')
-        output_path = os.path.join(output_dir, f'spotlight_{safe_name}.png')
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        
-        logger.info(f"Saved spotlight: {output_path}")
+        tasks.append(('spotlight', player, data, os.path.join(output_dir, f'spotlight_{safe_name}.png')))
+    return tasks
 
 
+# Bump when render_top5_chart / render_spotlight_card change how charts look
+CHART_STYLE_VERSION = 2
+CHART_HASH_KEY = 'ChartHash'
+
+
+def chart_hash(task: Tuple) -> str:
+    """Stable hash of everything that determines a chart's pixels (the board size is in the data)."""
+    kind, name, data, _ = task
+    if kind == 'chart':
+        payload = data.to_csv(index=False)
+    else:
+        payload = json.dumps(data, sort_keys=True, default=str)
+    style = json.dumps({'kind': kind, 'name': name, 'dpi': 150,
+                        'version': CHART_STYLE_VERSION, 'matplotlib': matplotlib.__version__})
+    return hashlib.sha256((style + payload).encode('utf-8')).hexdigest()
+
+
+def stored_chart_hash(output_path: str) -> Optional[str]:
+    """Hash recorded in an existing PNG's text metadata, if any."""
+    if not os.path.exists(output_path):
+        return None
+    try:
+        with Image.open(output_path) as img:
+            return img.info.get(CHART_HASH_KEY)
+    except Exception:
+        return None
+
+
+def _init_render_worker():
+    """Pool initializer: headless backend and the same style as the parent."""
+    matplotlib.use('Agg')
+    plt.style.use('default')
+
+
+def _render_task(task: Tuple, digest: Optional[str] = None) -> Tuple[str, str, float]:
+    """Render one chart task, stamping digest into the PNG; returns (kind, output path, seconds)."""
+    kind, name, data, output_path = task
+    metadata = {CHART_HASH_KEY: digest} if digest else None
+    start = time.perf_counter()
+    if kind == 'chart':
+        render_top5_chart(name, data, output_path, metadata)
+    else:
+        render_spotlight_card(name, data, output_path, metadata)
+    return kind, output_path, time.perf_counter() - start
+
+
+@instrumented(items=lambda counts, *args, **kwargs: counts)
+def render_charts(top5_dict: Dict, spotlights: Dict, output_dir: str, workers: int = None,
+                  use_cache: bool = None):
+    """
+    Render bar charts for Top-5 leaderboards and spotlight cards.
+    
+    With more than one worker each figure is drawn in its own pool process
+    (Agg backend). Output names depend only on the board/player, so results
+    are the same whatever the worker count.
+    
+    With the render cache on, each PNG carries a hash of its plotted data and
+    style; charts whose hash matches the file already on disk are not redrawn.
+    """
+    workers = CHART_WORKERS if workers is None else workers
+    workers = workers or os.cpu_count() or 1
+    use_cache = CHART_CACHE if use_cache is None else use_cache
+    logger.info(f"Rendering charts ({workers} worker{'s' if workers != 1 else ''})...")
+    
+    plt.style.use('default')
+    tasks = []
+    digests = []
+    reused = 0
+    for task in chart_tasks(top5_dict, spotlights, output_dir):
+        digest = chart_hash(task) if use_cache else None
+        if digest and stored_chart_hash(task[3]) == digest:
+            reused += 1
+            logger.info(f"Unchanged, reused: {task[3]}")
+            continue
+        tasks.append(task)
+        digests.append(digest)
+    start = time.perf_counter()
+    
+    if workers == 1 or len(tasks) <= 1:
+        results = [_render_task(task, digest) for task, digest in zip(tasks, digests)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_render_worker) as pool:
+            results = list(pool.map(_render_task, tasks, digests))
+    
+    busy = 0.0
+    for kind, output_path, seconds in results:
+        busy += seconds
+        label = 'chart' if kind == 'chart' else 'spotlight'
+        logger.info(f"Saved {label}: {output_path} ({seconds:.2f}s)")
+    
+    elapsed = time.perf_counter() - start
+    logger.info(f"Charts: {len(tasks)} rendered in {elapsed:.2f}s ({busy:.2f}s of render time), "
+                f"{reused} reused")
+    return {'rendered': len(tasks), 'reused': reused}
+
+
+@instrumented()
 def build_summary(top5_dict: Dict, spotlights: Dict, output_dir: str, 
                  df_images: Optional[pd.DataFrame] = None):
     """Build executive summary in Markdown and HTML."""
@@ -652,7 +1511,7 @@ def build_summary(top5_dict: Dict, spotlights: Dict, output_dir: str,
         md_lines.append(f"- Matches: {stats.get('matches', 0):.0f}")
         md_lines.append(f"- Runs: {stats.get('runs', 0):,.0f} (Avg: {stats.get('avg', 0):.2f})")
         md_lines.append(f"- Wickets: {stats.get('wickets', 0):.0f}")
-        md_lines.append(f"- Top-5 Appearances: {len(data['ranks'])}")
+        md_lines.append(f"- Top-{data.get('top_k', TOP_K)} Appearances: {len(data['ranks'])}")
         md_lines.append("\n")
     
     # Photo analysis
@@ -661,10 +1520,7 @@ def build_summary(top5_dict: Dict, spotlights: Dict, output_dir: str,
         md_lines.append(f"- Total images analyzed: {len(df_images)}")
         
         # Most photographed
-        player_counts = {}
-        for players in df_images['detected_players']:
-            for player in players:
-                player_counts[player] = player_counts.get(player, 0) + 1
+        player_counts = {player: len(paths) for player, paths in df_images.attrs['player_photos'].items()}
         
         if player_counts:
             top_photo = sorted(player_counts.items(), key=lambda x: x[1], reverse=True)[:5]
@@ -707,6 +1563,7 @@ def build_summary(top5_dict: Dict, spotlights: Dict, output_dir: str,
     logger.info(f"Saved: {html_path}")
 
 
+@instrumented()
 def save_outputs(top5_dict: Dict, player_stats: pd.DataFrame, output_dir: str):
     """Save Top-5 CSVs."""
     logger.info("Saving CSV outputs...")
@@ -722,35 +1579,119 @@ def save_outputs(top5_dict: Dict, player_stats: pd.DataFrame, output_dir: str):
     logger.info(f"Saved: {full_stats_path}")
 
 
-def main():
-    """Main execution function."""
-    logger.info("=" * 60)
-    logger.info("CRICKET STATISTICS ANALYZER - STARTING")
-    logger.info("=" * 60)
-    
-    try:
+@instrumented()
+def save_grouped_leaderboards(grouped: Dict, output_dir: str):
+    """Save one long-format CSV per dimension: slice, leaderboard, rank, player, value."""
+    for dim, slices in grouped.items():
+        rows = []
+        for value, top5_dict in slices.items():
+            for metric_name, top5_df in top5_dict.items():
+                metric_col = [c for c in top5_df.columns if c not in ['canonical_player', 'rank']][0]
+                for player, metric_value, rank in zip(top5_df['canonical_player'], top5_df[metric_col],
+                                                      top5_df['rank']):
+                    rows.append({dim: value, 'leaderboard': metric_name, 'rank': rank,
+                                 'canonical_player': player, 'value': metric_value})
+        
+        csv_path = os.path.join(output_dir, f'leaderboards_by_{dim}.csv')
+        pd.DataFrame(rows, columns=[dim, 'leaderboard', 'rank', 'canonical_player', 'value']).to_csv(
+            csv_path, index=False)
+        logger.info(f"Saved: {csv_path}")
+
+
+def prepare_player_stats() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load, clean and aggregate the stats CSV (or reuse the frame cache);
+    returns (df, player_stats). On the streaming and incremental paths df
+    holds spotlight rows only.
+    """
+    spotlight_only = bool(STREAMING_CHUNK_SIZE or INCREMENTAL_STATE_PATH)
+    cache_path = frame_cache_path(FRAME_CACHE_DIR, STATS_CSV_PATH, PLAYERS_WHITELIST,
+                                  FUZZY_MATCH_THRESHOLD, spotlight_only, SPOTLIGHT_PLAYERS)
+    cached = load_frame_cache(cache_path)
+    if cached:
+        # Input and config unchanged: skip straight to the leaderboards
+        return cached
+    
+    alias_cache = load_name_cache(NAME_CACHE_PATH, PLAYERS_WHITELIST, FUZZY_MATCH_THRESHOLD)
+    if INCREMENTAL_STATE_PATH:
+        # Fold only rows appended since the last run; df holds spotlight rows only
+        player_stats, df = incremental_player_stats(STATS_CSV_PATH, INCREMENTAL_STATE_PATH,
+                                                    PLAYERS_WHITELIST, FUZZY_MATCH_THRESHOLD,
+                                                    SPOTLIGHT_PLAYERS, alias_cache)
+    elif STREAMING_CHUNK_SIZE:
+        # Stream, process and aggregate chunk by chunk; df holds spotlight rows only
+        player_stats, df = stream_player_stats(STATS_CSV_PATH, STREAMING_CHUNK_SIZE,
+                                               PLAYERS_WHITELIST, FUZZY_MATCH_THRESHOLD,
+                                               SPOTLIGHT_PLAYERS, alias_cache)
+    else:
         # Load and process data
         df = load_data(STATS_CSV_PATH)
         df = normalize_names(df)
-        df = apply_whitelist_fuzzy(df, PLAYERS_WHITELIST, FUZZY_MATCH_THRESHOLD)
+        df = apply_whitelist_fuzzy(df, PLAYERS_WHITELIST, FUZZY_MATCH_THRESHOLD, alias_cache)
         df = engineer_metrics(df)
         
         # Aggregate player stats
         player_stats = aggregate_player_stats(df)
-        
-        # Build Top-5 leaderboards
-        top5_dict = build_top5(player_stats)
-        
-        # Generate spotlights
-        spotlights = spotlight_report(player_stats, top5_dict, SPOTLIGHT_PLAYERS, df)
-        
-        # Analyze photos (if available)
-        df_images = analyze_photos(IMAGES_DIR, PLAYERS_WHITELIST)
-        
-        # Save outputs
-        save_outputs(top5_dict, player_stats, OUTPUT_DIR)
-        render_charts(top5_dict, spotlights, OUTPUT_DIR)
-        build_summary(top5_dict, spotlights, OUTPUT_DIR, df_images)
+    
+    save_name_cache(NAME_CACHE_PATH, PLAYERS_WHITELIST, FUZZY_MATCH_THRESHOLD, alias_cache)
+    save_frame_cache(cache_path, df, player_stats)
+    return df, player_stats
+
+
+def grouped_leaderboards(df: pd.DataFrame) -> Dict:
+    """Per-season/opponent/venue leaderboards; they need every row, not just spotlight rows."""
+    if not GROUPED_LEADERBOARD_DIMENSIONS:
+        return {}
+    if STREAMING_CHUNK_SIZE or INCREMENTAL_STATE_PATH:
+        logger.warning("Grouped leaderboards need the in-memory path "
+                       "(STREAMING_CHUNK_SIZE and INCREMENTAL_STATE_PATH unset). Skipping...")
+        return {}
+    return build_grouped_leaderboards(aggregate_grouped_stats(df, GROUPED_LEADERBOARD_DIMENSIONS))
+
+
+def build_pipeline() -> StageGraph:
+    """
+    The analysis as a stage graph. Photo analysis only needs the photos, so
+    it runs alongside loading and aggregating the stats; the leaderboard
+    outputs start as soon as the boards they use are built.
+    """
+    # A profile only sees the main thread, so profiled runs go one stage at a time
+    graph = StageGraph(concurrent=PIPELINE_CONCURRENT and not PROFILE_PATH, processes=PIPELINE_PROCESSES)
+    graph.add('player_stats', prepare_player_stats, kind='process')
+    graph.add('photos', lambda: analyze_photos(IMAGES_DIR, PLAYERS_WHITELIST))
+    graph.add('top5', lambda data: build_top5(data[1]), inputs=['player_stats'])
+    graph.add('grouped', lambda data: grouped_leaderboards(data[0]), inputs=['player_stats'])
+    graph.add('spotlights', lambda data, top5_dict: spotlight_report(data[1], top5_dict, SPOTLIGHT_PLAYERS,
+                                                                     data[0]),
+              inputs=['player_stats', 'top5'])
+    graph.add('save_outputs', lambda data, top5_dict: save_outputs(top5_dict, data[1], OUTPUT_DIR),
+              inputs=['player_stats', 'top5'])
+    graph.add('save_grouped', lambda grouped: save_grouped_leaderboards(grouped, OUTPUT_DIR), inputs=['grouped'])
+    # pyplot is not thread-safe: charts are drawn from the main thread (or a process pool)
+    graph.add('charts', lambda top5_dict, spotlights: render_charts(top5_dict, spotlights, OUTPUT_DIR),
+              inputs=['top5', 'spotlights'], kind='main')
+    graph.add('summary', lambda top5_dict, spotlights, df_images: build_summary(top5_dict, spotlights,
+                                                                               OUTPUT_DIR, df_images),
+              inputs=['top5', 'spotlights', 'photos'])
+    return graph
+
+
+def main():
+    """Main execution function."""
+    logger.info("=" * 60)
+    logger.info("CRICKET STATISTICS ANALYZER - STARTING")
+    logger.info("=" * 60)
+    
+    if METRICS_PATH or PROFILE_PATH:
+        start_run(PROFILE_PATH)
+    
+    try:
+        graph = build_pipeline()
+        results = graph.run()
+        player_stats = results['player_stats'][1]
+        top5_dict = results['top5']
+        spotlights = results['spotlights']
+        chart_counts = results['charts']
         
         # Final summary
         logger.info("\n" + "=" * 60)
@@ -758,22 +1699,45 @@ def main():
         logger.info("=" * 60)
         logger.info(f"Output directory: {OUTPUT_DIR}")
         logger.info(f"Players analyzed: {len(player_stats)}")
-        logger.info(f"Top-5 leaderboards: {len(top5_dict)}")
+        logger.info(f"Top-{TOP_K} leaderboards: {len(top5_dict)}")
         logger.info(f"Spotlight reports: {len(spotlights)}")
+        logger.info(f"Charts rendered: {chart_counts['rendered']}, reused: {chart_counts['reused']}")
         
         # Print spotlight rankings
         for player, data in spotlights.items():
             logger.info(f"\n{player}:")
-            logger.info(f"  - Top-5 appearances: {len(data['ranks'])}")
+            logger.info(f"  - Top-{data.get('top_k', TOP_K)} appearances: {len(data['ranks'])}")
             for metric, rank in sorted(data['ranks'].items())[:3]:
                 logger.info(f"    #{rank} in {metric}")
         
+        logger.info("\nStage timings (* = critical path):")
+        for line in graph.report():
+            logger.info(line)
+        
+        run = end_run()
+        if run and METRICS_PATH:
+            run.write(METRICS_PATH, pipeline=graph.summary(), players=len(player_stats))
+            logger.info(f"Run metrics: {METRICS_PATH}")
+        if run and run.profile_path:
+            logger.info(f"Profile: {run.profile_path}")
+        
         logger.info("\n" + "=" * 60)
         
     except Exception as e:
+        end_run()
         logger.error(f"Fatal error: {e}", exc_info=True)
         raise
 
 
 if __name__ == "__main__":
+    if '--verify-incremental' in sys.argv[1:]:
+        sys.exit(0 if verify_incremental_state(STATS_CSV_PATH, INCREMENTAL_STATE_PATH, PLAYERS_WHITELIST,
+                                               FUZZY_MATCH_THRESHOLD, SPOTLIGHT_PLAYERS) else 1)
+    if '--player-photos' in sys.argv[1:-1]:
+        name = sys.argv[sys.argv.index('--player-photos') + 1]
+        paths = player_photos_of(name)
+        if not paths:
+            logger.warning(f"No photos of {name} in {PHOTO_INDEX_PATH or 'the photo index (disabled)'}")
+        print('\n'.join(paths))
+        sys.exit(0 if paths else 1)
     main()
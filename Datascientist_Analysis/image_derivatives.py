@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Image Derivatives
+Right-sized web variants of a decoded photo: several widths in AVIF, WebP
+and JPEG, plus a tiny inline placeholder (LQIP), described in a JSON
+manifest the website can read.
+
+File names carry a prefix of the source's content hash, so a changed photo
+gets new URLs and unchanged ones keep theirs.
+"""
+
+import os
+import io
+import re
+import json
+import base64
+from typing import Dict, List, Optional, Sequence
+
+from PIL import Image, features
+
+if not features.check('avif'):
+    try:
+        import pillow_avif  # noqa: F401  (registers an AVIF encoder on Pillow builds before 11.2)
+    except ImportError:
+        pass
+
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+DERIVATIVE_FORMATS = ('avif', 'webp', 'jpeg')  # formats Pillow can't encode are skipped
+DERIVATIVE_QUALITY = {'avif': 55, 'webp': 75, 'jpeg': 80}
+PLACEHOLDER_WIDTH = 16
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+EXTENSIONS = {'avif': '.avif', 'webp': '.webp', 'jpeg': '.jpg'}
+VARIANT_NAME = re.compile(r'\.\d+\.[0-9a-f]{10}\.(avif|webp|jpg)$')  # <stem>.<width>.<hash>.<ext>
+
+# EXIF orientation -> transpose that makes the pixels upright (as ImageOps.exif_transpose)
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+def supported_formats(formats: Sequence[str] = DERIVATIVE_FORMATS) -> List[str]:
+    """The requested formats this Pillow build (plus pillow-avif-plugin, if installed) can encode."""
+    Image.init()
+    return [fmt for fmt in formats if fmt == 'jpeg' or features.check(fmt) or fmt.upper() in Image.SAVE]
+
+
+def upright(img: Image.Image, orientation: Optional[int]) -> Image.Image:
+    """Apply an EXIF orientation, since derivatives don't carry EXIF."""
+    transpose = ORIENTATION_TRANSPOSE.get(orientation or 1)
+    return img.transpose(transpose) if transpose is not None else img
+
+
+def placeholder_data_uri(img: Image.Image) -> str:
+    """Tiny blurred preview as a data: URI (usable as a CSS background or Next.js blurDataURL)."""
+    thumb = img.copy()
+    thumb.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+    fmt = 'webp' if features.check('webp') else 'jpeg'
+    buf = io.BytesIO()
+    thumb.save(buf, format=fmt.upper(), quality=40)
+    return f"data:image/{fmt};base64,{base64.b64encode(buf.getvalue()).decode('ascii')}"
+
+
+def write_derivatives(img: Image.Image, content_hash: str, output_dir: str, rel_path: str,
+                      source_size: Sequence[int], widths: Sequence[int] = DERIVATIVE_WIDTHS,
+                      formats: Sequence[str] = DERIVATIVE_FORMATS) -> Dict:
+    """
+    Encode img (upright RGB, decoded at least as wide as the largest width)
+    at each width and format under output_dir, mirroring rel_path.
+
+    Widths at or above the source width are dropped; the source width itself
+    is used instead so every photo gets at least one variant. Returns the
+    manifest entry for this photo.
+    """
+    source_width, source_height = source_size
+    targets = sorted({w for w in widths if w < source_width} | {min(max(widths), source_width)})
+    stem = os.path.splitext(rel_path)[0]
+    os.makedirs(os.path.dirname(os.path.join(output_dir, stem)) or output_dir, exist_ok=True)
+
+    variants = []
+    for width in targets:
+        height = max(round(source_height * width / source_width), 1)
+        resized = img.resize((width, height), Image.Resampling.LANCZOS) if img.width != width else img
+        for fmt in supported_formats(formats):
+            name = f"{stem}.{width}.{content_hash[:10]}{EXTENSIONS[fmt]}"
+            resized.save(os.path.join(output_dir, name), format=fmt.upper(),
+                         quality=DERIVATIVE_QUALITY[fmt])
+            variants.append({'src': name.replace(os.sep, '/'), 'format': fmt, 'width': width,
+                             'height': height, 'bytes': os.path.getsize(os.path.join(output_dir, name))})
+
+    return {
+        'sha256': content_hash,
+        'width': source_width,
+        'height': source_height,
+        'placeholder': placeholder_data_uri(img),
+        'variants': variants,
+    }
+
+
+def manifest_key(path: str, source_root: str) -> str:
+    """A source photo's manifest key: its path relative to source_root, with '/' separators."""
+    return os.path.relpath(path, source_root).replace(os.sep, '/')
+
+
+def derivatives_exist(entry: Dict, output_dir: str) -> bool:
+    """True when every variant file of a manifest entry is on disk."""
+    return all(os.path.isfile(os.path.join(output_dir, v['src'])) for v in entry['variants'])
+
+
+def manifest_options() -> Dict:
+    """The settings every entry in a manifest was produced with."""
+    return {'widths': list(DERIVATIVE_WIDTHS), 'formats': supported_formats()}
+
+
+def load_manifest(output_dir: str) -> Dict[str, Dict]:
+    """Manifest entries by source path (relative to the source root); {} if missing or stale."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('options') != manifest_options():
+        return {}
+    return manifest.get('images', {})
+
+
+def save_manifest(output_dir: str, entries: Dict[str, Dict]):
+    """Write the manifest atomically and delete variant files no entry references
+    (only files named like variants are ever removed)."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'options': manifest_options(),
+                   'images': dict(sorted(entries.items()))}, f, indent=2)
+    os.replace(tmp_path, path)
+
+    referenced = {os.path.normpath(v['src']) for entry in entries.values() for v in entry['variants']}
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            rel = os.path.normpath(os.path.relpath(os.path.join(root, name), output_dir))
+            if VARIANT_NAME.search(name) and rel not in referenced:
+                os.remove(os.path.join(output_dir, rel))
+
+
+def update_manifest(output_dir: str, entries: Dict[str, Dict]):
+    """Add or replace manifest entries (by manifest_key), keeping every other entry."""
+    manifest = load_manifest(output_dir)
+    manifest.update(entries)
+    save_manifest(output_dir, manifest)
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Image Ingestion
+One pass per photo, shared by the stats analyzer's photo analysis and the
+photo analytics script.
+
+Each photo is opened once for its header (dimensions, EXIF timestamp), gets
+one reduced-resolution decode for mean color and the OCR gate, and one
+full-resolution decode only if OCR runs. Results can be kept in a SQLite
+cache keyed by file content, so a photo ingested by either script is not
+decoded or OCR'd again by the other.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ExifTags
+
+from ocr_gate import OCR_GATE_MODES, count_text_tiles
+from image_derivatives import DERIVATIVE_WIDTHS, derivatives_exist, upright, write_derivatives
+
+try:
+    import pytesseract
+    pytesseract.get_tesseract_version()  # raises if the tesseract binary isn't installed
+    TESSERACT_AVAILABLE = True
+except (ImportError, OSError):
+    TESSERACT_AVAILABLE = False
+
+# Bump whenever ingest_image changes what it records, so cached records are redone
+INGEST_VERSION = 1
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+COLOR_SAMPLE_SIZE = 256  # Shortest side (px) mean color is sampled at when the gate isn't probing
+
+EXIF_DATETIME = next(k for k, v in ExifTags.TAGS.items() if v == 'DateTime')
+EXIF_ORIENTATION = next(k for k, v in ExifTags.TAGS.items() if v == 'Orientation')
+
+
+def find_images(images_dir: str, extensions: Sequence[str] = IMAGE_EXTENSIONS,
+                recursive: bool = True, skip_dirs: Sequence[str] = ()) -> List[str]:
+    """
+    Sorted paths of image files under images_dir (extension match is
+    case-insensitive), leaving out anything under skip_dirs, such as a
+    derivatives folder kept inside the photo folder.
+    """
+    skipped = {os.path.abspath(d) for d in skip_dirs if d}
+    if recursive:
+        candidates = []
+        for root, dirs, files in os.walk(images_dir):
+            dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) not in skipped]
+            candidates.extend(os.path.join(root, f) for f in files)
+    else:
+        candidates = (os.path.join(images_dir, f) for f in os.listdir(images_dir))
+    return sorted(p for p in candidates
+                  if os.path.splitext(p)[1].lower() in extensions and os.path.isfile(p))
+
+
+def file_content_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hashes(image_paths: Iterable[str]) -> Dict[str, str]:
+    """file_content_hash of each path, leaving out files that can't be read."""
+    digests = {}
+    for path in image_paths:
+        try:
+            digests[path] = file_content_hash(path)
+        except OSError:
+            pass
+    return digests
+
+
+def reduced_decode(image_path: str, size: int) -> Image.Image:
+    """
+    RGB decode with the shortest side cut down to about size px. JPEGs are
+    DCT-scaled while decoding (draft mode); other formats are box-reduced.
+    """
+    with Image.open(image_path) as img:
+        img.draft('RGB', (size, size))
+        rgb = img.convert('RGB')
+    factor = min(rgb.size) // size
+    return rgb.reduce(factor) if factor > 1 else rgb
+
+
+def open_full_rgb(image_path: str) -> Image.Image:
+    """
+    Full-resolution RGB image. RGB files stay file-backed with their format,
+    so pytesseract can hand them to Tesseract without re-encoding.
+    """
+    img = Image.open(image_path)
+    if img.mode == 'RGB':
+        img.load()
+        return img
+    with img:
+        return img.convert('RGB')
+
+
+def _mtime_timestamp(image_path: str) -> str:
+    return datetime.fromtimestamp(os.path.getmtime(image_path)).isoformat(sep=' ', timespec='seconds')
+
+
+def ingest_options(ocr: bool = True, ocr_gate: str = 'recall', fast_decode: bool = True,
+                   derivatives_dir: Optional[str] = None, derivatives_root: Optional[str] = None) -> str:
+    """Cache key part for the options a record was produced with."""
+    options = f"ocr={int(ocr and TESSERACT_AVAILABLE)};gate={ocr_gate};fast={int(fast_decode)}"
+    if derivatives_dir:
+        # Variant names mirror the path under derivatives_root, so both are part of the key
+        options += f";derivatives={os.path.abspath(derivatives_dir)}"
+        options += f";root={os.path.abspath(derivatives_root) if derivatives_root else ''}"
+    return options
+
+
+def ingest_image(image_path: str, ocr: bool = True, ocr_gate: str = 'recall',
+                 fast_decode: bool = True, derivatives_dir: Optional[str] = None,
+                 derivatives_root: Optional[str] = None) -> Dict:
+    """
+    Everything both analyzers need from one photo.
+
+    ocr_status is 'ran', 'skipped' (the gate saw no text), 'failed' or 'off'.
+    Errors are reported in the record's 'error' field rather than raised, so
+    one bad file doesn't stop a batch.
+
+    With derivatives_dir set, web variants (see image_derivatives) are
+    written from the same reduced decode, mirroring the photo's path under
+    derivatives_root (default: its folder), and described in 'derivatives'.
+    """
+    record = {'path': image_path, 'filename': os.path.basename(image_path)}
+    try:
+        record['size_mb'] = os.path.getsize(image_path) / (1024 * 1024)
+
+        # Header only: no pixels are decoded here
+        with Image.open(image_path) as img:
+            record['width'], record['height'] = img.size
+            exif = img.getexif()
+        orientation = exif.get(EXIF_ORIENTATION)
+        timestamp = exif.get(EXIF_DATETIME)
+        record['timestamp'] = str(timestamp) if timestamp else _mtime_timestamp(image_path)
+        record['timestamp_source'] = 'exif' if timestamp else 'mtime'
+
+        gate = OCR_GATE_MODES[ocr_gate] if ocr and TESSERACT_AVAILABLE else None
+        probe_size = gate[0] if gate else COLOR_SAMPLE_SIZE
+        full = None
+        if fast_decode:
+            decode_size = max(probe_size, max(DERIVATIVE_WIDTHS)) if derivatives_dir else probe_size
+            decoded = reduced_decode(image_path, decode_size)
+        else:
+            full = open_full_rgb(image_path)
+            decoded = full
+
+        if derivatives_dir:
+            rel_path = os.path.relpath(image_path, derivatives_root or os.path.dirname(image_path))
+            source_size = (record['width'], record['height'])
+            if orientation in (5, 6, 7, 8):  # quarter turns swap width and height
+                source_size = source_size[::-1]
+            record['derivatives'] = write_derivatives(upright(decoded, orientation), file_content_hash(image_path),
+                                                      derivatives_dir, rel_path, source_size)
+            record['derivatives_dir'] = os.path.abspath(derivatives_dir)
+
+        probe = decoded
+        factor = min(decoded.size) // probe_size if fast_decode else 1
+        if factor > 1:
+            probe = decoded.reduce(factor)
+        record['mean_color'] = np.asarray(probe).mean(axis=(0, 1)).tolist()
+
+        record['ocr_text'] = ""
+        record['ocr_seconds'] = 0.0
+        record['gate_seconds'] = 0.0
+        if not (ocr and TESSERACT_AVAILABLE):
+            record['ocr_status'] = 'off'
+            return record
+
+        if gate:
+            start = time.perf_counter()
+            gray = probe.convert('L')
+            factor = min(gray.size) // gate[0]
+            if factor > 1:
+                gray = gray.reduce(factor)
+            run_ocr = count_text_tiles(np.asarray(gray)) >= gate[1]
+            record['gate_seconds'] = time.perf_counter() - start
+            if not run_ocr:
+                record['ocr_status'] = 'skipped'
+                return record
+
+        start = time.perf_counter()
+        try:
+            if full is None:
+                full = open_full_rgb(image_path)
+            record['ocr_text'] = pytesseract.image_to_string(full)
+            record['ocr_status'] = 'ran'
+        except Exception as e:
+            record['ocr_status'] = 'failed'
+            record['ocr_error'] = str(e)
+        record['ocr_seconds'] = time.perf_counter() - start
+        return record
+
+    except Exception as e:
+        record['error'] = str(e)
+        return record
+
+
+class IngestCache:
+    """
+    SQLite store of ingest_image records keyed by content hash, INGEST_VERSION
+    and ingest options, so renamed or moved photos still hit and edited ones miss.
+    Perceptual hashes (photo_dedup) are kept alongside, keyed by content hash.
+    Every path seen with a content hash is recorded, so an entry shared by
+    copies of one photo is only pruned once none of them exists.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_ingest (
+                content_hash TEXT NOT NULL,
+                ingest_version INTEGER NOT NULL,
+                options TEXT NOT NULL,
+                path TEXT NOT NULL,
+                record TEXT NOT NULL,
+                ingested_at TEXT NOT NULL,
+                PRIMARY KEY (content_hash, ingest_version, options)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS perceptual_hash (
+                content_hash TEXT NOT NULL,
+                hash_size INTEGER NOT NULL,
+                dhash TEXT NOT NULL,
+                path TEXT NOT NULL,
+                PRIMARY KEY (content_hash, hash_size)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS known_path (
+                content_hash TEXT NOT NULL,
+                path TEXT NOT NULL,
+                PRIMARY KEY (content_hash, path)
+            )
+        """)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_hash: str, options: str, image_path: str) -> Optional[Dict]:
+        """Cached record for this content, re-pointed at image_path, or None."""
+        row = self.conn.execute(
+            "SELECT record, path FROM image_ingest "
+            "WHERE content_hash = ? AND ingest_version = ? AND options = ?",
+            (content_hash, INGEST_VERSION, options)).fetchone()
+        record = json.loads(row[0]) if row else None
+        if record is None or (record.get('derivatives')
+                              and not derivatives_exist(record['derivatives'], record['derivatives_dir'])):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if image_path != row[1]:
+            # A copy, or the photo was moved or renamed; track this location so prune keeps the entry
+            self._add_paths([(content_hash, image_path)])
+        record['path'] = image_path
+        record['filename'] = os.path.basename(image_path)
+        if record['timestamp_source'] == 'mtime':
+            record['timestamp'] = _mtime_timestamp(image_path)
+        return record
+
+    def put(self, content_hash: str, options: str, record: Dict):
+        """Store one record (failed OCR and errors are left out so they get retried)."""
+        if record.get('error') or record.get('ocr_status') == 'failed':
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO image_ingest VALUES (?, ?, ?, ?, ?, ?)",
+            (content_hash, INGEST_VERSION, options, record['path'], json.dumps(record),
+             datetime.now().isoformat(timespec='seconds')))
+        self._add_paths([(content_hash, record['path'])])
+
+    def get_perceptual_hashes(self, content_hashes: Iterable[str], hash_size: int) -> Dict[str, int]:
+        """Stored perceptual hashes by content hash, for those of content_hashes that have one."""
+        wanted = set(content_hashes)
+        rows = self.conn.execute("SELECT content_hash, dhash FROM perceptual_hash WHERE hash_size = ?",
+                                 (hash_size,))
+        return {content_hash: int(dhash, 16) for content_hash, dhash in rows if content_hash in wanted}
+
+    def put_perceptual_hashes(self, hashes: Dict[str, Tuple[int, str]], hash_size: int):
+        """Store content hash -> (perceptual hash, path) pairs."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO perceptual_hash VALUES (?, ?, ?, ?)",
+            [(content_hash, hash_size, format(value, 'x'), path) for content_hash, (value, path) in hashes.items()])
+        self._add_paths([(content_hash, path) for content_hash, (_, path) in hashes.items()])
+
+    def _add_paths(self, pairs: List[Tuple[str, str]]):
+        """Record (content hash, path) pairs as known locations of that content."""
+        self.conn.executemany("INSERT OR IGNORE INTO known_path VALUES (?, ?)", pairs)
+        self.conn.commit()
+
+    def prune(self) -> Tuple[int, int]:
+        """
+        Delete entries whose content no longer exists at any known path, or
+        from older ingest versions. Known paths that are gone are dropped too.
+        """
+        rows = self.conn.execute("SELECT content_hash, ingest_version, options, path FROM image_ingest").fetchall()
+        hash_rows = self.conn.execute("SELECT content_hash, hash_size, path FROM perceptual_hash").fetchall()
+        known = self.conn.execute("SELECT content_hash, path FROM known_path").fetchall()
+        # Caches written before known_path only have the path stored with each entry
+        candidates = set(known) | {(h, path) for h, _, _, path in rows} | {(h, path) for h, _, path in hash_rows}
+        existing = {pair for pair in candidates if os.path.isfile(pair[1])}
+        alive = {h for h, _ in existing}
+
+        stale = [(h, v, o) for h, v, o, _ in rows if v != INGEST_VERSION or h not in alive]
+        self.conn.executemany(
+            "DELETE FROM image_ingest WHERE content_hash = ? AND ingest_version = ? AND options = ?", stale)
+        stale_hashes = [(h, size) for h, size, _ in hash_rows if h not in alive]
+        self.conn.executemany("DELETE FROM perceptual_hash WHERE content_hash = ? AND hash_size = ?", stale_hashes)
+        self.conn.executemany("DELETE FROM known_path WHERE content_hash = ? AND path = ?",
+                              [pair for pair in known if pair not in existing])
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+        removed = len(stale) + len(stale_hashes)
+        return removed, len(rows) + len(hash_rows) - removed
+
+    def close(self):
+        self.conn.close()
+
+
+def iter_ingest(image_paths: Iterable[str], workers: int = 1, max_in_flight: Optional[int] = None,
+                cache: Optional[IngestCache] = None, digests: Optional[Dict[str, str]] = None,
+                **options) -> Iterator[Dict]:
+    """
+    Stream ingest_image records in image_paths order.
+
+    Cache hits are served without decoding; misses run in-process, or on a
+    pool of `workers` processes with max_in_flight photos (default 2 per
+    worker) decoding at once. Photos that finish ahead of a slower earlier
+    one wait for it, up to 4 x max_in_flight queued, so memory stays bounded
+    however many photos there are. Records carry 'cached': True when served from cache.
+    digests holds content hashes already computed (content_hashes), so those
+    files aren't read again for the cache lookup.
+    """
+    options_key = ingest_options(**options)
+    digests = digests or {}
+
+    def lookup(path):
+        digest = (digests.get(path) or file_content_hash(path)) if cache else None
+        record = cache.get(digest, options_key, path) if cache else None
+        if record is not None:
+            record['cached'] = True
+        return path, digest, record
+
+    def store(digest, record):
+        if cache:
+            cache.put(digest, options_key, record)
+        record['cached'] = False
+        return record
+
+    if workers <= 1:
+        for path in image_paths:
+            path, digest, record = lookup(path)
+            yield record if record is not None else store(digest, ingest_image(path, **options))
+        return
+
+    max_in_flight = max_in_flight or 2 * workers
+    max_queued = 4 * max_in_flight
+    paths = iter(image_paths)
+    queue = deque()  # (digest, cached record or future) in input order
+    exhausted = False
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Keep max_in_flight photos decoding; finished ones and cache hits wait in
+            # the queue, which is capped separately
+            in_flight = sum(1 for _, record in queue if isinstance(record, Future) and not record.done())
+            while not exhausted and in_flight < max_in_flight and len(queue) < max_queued:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                    break
+                path, digest, record = lookup(path)
+                if record is None:
+                    record = pool.submit(ingest_image, path, **options)
+                    in_flight += 1
+                queue.append((digest, record))
+            if not queue:
+                return
+
+            head = queue[0][1]
+            if isinstance(head, Future) and not head.done() and not exhausted and len(queue) < max_queued:
+                # A slow head photo must not stall the pool: wake on whichever photo finishes next
+                wait([record for _, record in queue if isinstance(record, Future) and not record.done()],
+                     return_when=FIRST_COMPLETED)
+                continue
+
+            digest, record = queue.popleft()
+            yield record if isinstance(record, dict) else store(digest, record.result())
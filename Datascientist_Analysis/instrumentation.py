@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Instrumentation
+Per-stage wall time, CPU time, peak memory and item counts for a run,
+written as JSON, plus an optional whole-run profile.
+
+Functions are wrapped with @instrumented (or a block with span()); while a
+run is active each call records a span: wall seconds, CPU seconds of its
+own thread and of the whole process, CPU of pool processes it waited for,
+peak RSS and counts such as rows, names, images or OCR calls. Calls with
+the same name are summed. Outside a run the wrappers cost one check.
+
+Peak RSS is sampled every RSS_SAMPLE_INTERVAL seconds from /proc (Linux);
+elsewhere it falls back to the process high-water mark so far. Stages the
+stage graph runs on its process pool record their spans there and send them
+back to be merged (their CPU and RSS are the worker's); spans inside other
+pool processes (photo and chart workers) are not collected.
+
+A profile covers the main thread: with one, both pipelines run their
+stages one at a time on the main thread. '.prof' writes cProfile stats
+(open with pstats or snakeviz), '.html' a pyinstrument report (optional
+package).
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RSS_SAMPLE_INTERVAL = 0.01  # Seconds between RSS samples while a run is active
+PROFILE_FORMATS = {'.prof': 'cProfile', '.html': 'pyinstrument'}
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_MB = 1024 * 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Process high-water RSS so far, in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / _MB if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KB elsewhere
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory right now, in MB; the high-water mark where /proc is missing."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / _MB
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def _child_cpu_seconds() -> float:
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def _new_record() -> Dict:
+    return {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'process_cpu_seconds': 0.0,
+            'child_cpu_seconds': 0.0, 'peak_rss_mb': 0.0, 'items': {}}
+
+
+def _fold_record(record: Dict, other: Dict):
+    for key in ('calls', 'wall_seconds', 'cpu_seconds', 'process_cpu_seconds', 'child_cpu_seconds'):
+        record[key] += other[key]
+    record['peak_rss_mb'] = max(record['peak_rss_mb'], other['peak_rss_mb'])
+    for key, value in other['items'].items():
+        record['items'][key] = record['items'].get(key, 0) + value
+
+
+class RunMetrics:
+    """Spans of one run, summed by name in first-call order."""
+
+    def __init__(self, profile_path: str = ""):
+        self.profile_path = profile_path
+        self.spans: Dict[str, Dict] = {}
+        self.open_spans: Dict[int, list] = {}  # id -> [span counts, peak RSS seen while open]
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stopped = threading.Event()
+        self.profiler = None
+        self.started = datetime.now()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+
+    @property
+    def profiling(self) -> bool:
+        return bool(self.profile_path)
+
+    def start(self):
+        self.sampler = threading.Thread(target=self._sample_rss, name='rss-sampler', daemon=True)
+        self.sampler.start()
+        if self.profile_path:
+            self._start_profiler()
+
+    def stop(self):
+        if self.profiler is not None:
+            self._stop_profiler()
+        self.stopped.set()
+        self.sampler.join()
+        self.wall_seconds = time.perf_counter() - self.start_wall
+        self.cpu_seconds = time.process_time() - self.start_cpu
+
+    def _sample_rss(self):
+        while not self.stopped.wait(RSS_SAMPLE_INTERVAL):
+            rss = current_rss_mb()
+            if rss is None:
+                return
+            with self.lock:
+                for entry in self.open_spans.values():
+                    entry[1] = max(entry[1], rss)
+
+    def _start_profiler(self):
+        extension = os.path.splitext(self.profile_path)[1].lower()
+        if PROFILE_FORMATS.get(extension) == 'pyinstrument':
+            try:
+                import pyinstrument
+                self.profiler = pyinstrument.Profiler()
+            except ImportError:
+                warnings.warn("pyinstrument not available. Writing a cProfile dump instead.")
+                self.profile_path = os.path.splitext(self.profile_path)[0] + '.prof'
+        if self.profiler is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def _stop_profiler(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.profile_path)), exist_ok=True)
+        if hasattr(self.profiler, 'output_html'):
+            self.profiler.stop()
+            with open(self.profile_path, 'w', encoding='utf-8') as f:
+                f.write(self.profiler.output_html())
+        else:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Dict]:
+        counts: Dict[str, float] = {}
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        stack = self.local.stack
+        stack.append(counts)
+        entry = [counts, current_rss_mb() or 0.0]
+        with self.lock:
+            self.open_spans[id(entry)] = entry
+        wall, cpu, process_cpu, child_cpu = (time.perf_counter(), time.thread_time(), time.process_time(),
+                                             _child_cpu_seconds())
+        try:
+            yield counts
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.thread_time() - cpu
+            process_cpu = time.process_time() - process_cpu
+            child_cpu = _child_cpu_seconds() - child_cpu
+            stack.pop()
+            with self.lock:
+                del self.open_spans[id(entry)]
+                peak = max(entry[1], current_rss_mb() or 0.0)
+                _fold_record(self.spans.setdefault(name, _new_record()), {
+                    'calls': 1, 'wall_seconds': wall, 'cpu_seconds': cpu, 'process_cpu_seconds': process_cpu,
+                    'child_cpu_seconds': child_cpu, 'peak_rss_mb': peak, 'items': counts})
+
+    def merge(self, spans: Dict[str, Dict]):
+        """Fold in spans recorded by another process's run (e.g. a pool worker running a stage)."""
+        with self.lock:
+            for name, other in spans.items():
+                _fold_record(self.spans.setdefault(name, _new_record()), other)
+
+    def count(self, key: str, value: float = 1):
+        """Add to a count of the innermost open span on this thread."""
+        stack = getattr(self.local, 'stack', None)
+        if stack:
+            stack[-1][key] = stack[-1].get(key, 0) + value
+
+    def summary(self, **extra) -> Dict:
+        spans = {name: dict(record, wall_seconds=round(record['wall_seconds'], 4),
+                            cpu_seconds=round(record['cpu_seconds'], 4),
+                            process_cpu_seconds=round(record['process_cpu_seconds'], 4),
+                            child_cpu_seconds=round(record['child_cpu_seconds'], 4),
+                            peak_rss_mb=round(record['peak_rss_mb'], 1))
+                 for name, record in self.spans.items()}
+        peak = peak_rss_mb()
+        return dict({
+            'started': self.started.isoformat(timespec='seconds'),
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+            'profile': self.profile_path or None,
+            'spans': spans,
+        }, **extra)
+
+    def write(self, path: str, **extra) -> Dict:
+        """Atomically write summary(**extra) as JSON; returns it."""
+        summary = self.summary(**extra)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return summary
+
+
+_run: Optional[RunMetrics] = None
+
+
+def _forget_run_in_child():
+    # A forked pool worker inherits the run, but not its sampler thread, and
+    # possibly a lock held at fork time; spans there are dropped instead
+    global _run
+    _run = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_run_in_child)
+
+
+def start_run(profile_path: str = "") -> RunMetrics:
+    """Begin collecting spans (and profiling, given a path) for this process."""
+    global _run
+    if _run is not None:
+        end_run()
+    _run = RunMetrics(profile_path)
+    _run.start()
+    return _run
+
+
+def end_run() -> Optional[RunMetrics]:
+    """Stop the active run and return it (None when no run was active)."""
+    global _run
+    run, _run = _run, None
+    if run is not None:
+        run.stop()
+    return run
+
+
+def active_run() -> Optional[RunMetrics]:
+    return _run
+
+
+@contextmanager
+def span(name: str) -> Iterator[Optional[Dict]]:
+    """Record the block as a span of the active run; a no-op without one."""
+    if _run is None:
+        yield None
+        return
+    with _run.span(name) as counts:
+        yield counts
+
+
+def add_count(key: str, value: float = 1):
+    """Add to a count (rows, names, images, ocr_calls, ...) of the innermost open span."""
+    if _run is not None:
+        _run.count(key, value)
+
+
+def instrumented(name: Optional[str] = None, items: Optional[Callable[..., Dict[str, float]]] = None):
+    """
+    Decorator recording each call as a span named name (default: the
+    function's name). items(result, *args, **kwargs) returns counts to add
+    to the span, e.g. lambda df, *_: {'rows': len(df)}.
+    """
+    def decorate(func):
+        span_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            run = _run  # the run active at the call, even if func ends it or starts another
+            if run is None:
+                return func(*args, **kwargs)
+            with run.span(span_name):
+                result = func(*args, **kwargs)
+                if items is not None:
+                    for key, value in (items(result, *args, **kwargs) or {}).items():
+                        run.count(key, value)
+                return result
+        return wrapper
+    return decorate
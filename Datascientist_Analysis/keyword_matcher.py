@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Keyword Matcher
+Aho-Corasick automaton that finds every keyword in a batch of texts in one
+pass over each text.
+
+Keywords are compiled into a DFA over bytes (bytes no keyword uses share one
+column), and a batch of texts advances through it together: one numpy step
+per character position moves every text at once, so the Python-level loop
+runs once per position instead of once per keyword per text. With
+max_edits, each keyword also matches anything within that many
+single-character edits (OCR slips such as "tr0phy" or "leaderbord"): its
+edit variants go into the same automaton, and the scan costs the same
+however many variants there are. A variant only counts as a whole word
+(nothing alphanumeric on either side) and at least min_edit_length long,
+so "able" inside "available" or "an of" inside "Plan of" is not a hit.
+"""
+
+import string
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+EDIT_ALPHABET = string.ascii_lowercase + string.digits + ' '  # Characters edits may insert or substitute
+MIN_EDIT_LENGTH = 5  # Shorter keywords only match exactly; one edit away from "ccpl" is too loose
+MAX_BATCH_CELLS = 4_000_000  # Texts x characters of automaton states held at once
+
+
+def edit_variants(keyword: str, max_edits: int = 1, alphabet: str = EDIT_ALPHABET) -> Set[str]:
+    """keyword plus every string within max_edits deletions, substitutions or insertions."""
+    variants = {keyword}
+    frontier = {keyword}
+    for _ in range(max_edits):
+        grown = set()
+        for word in frontier:
+            for i in range(len(word) + 1):
+                if i < len(word):
+                    grown.add(word[:i] + word[i + 1:])
+                    grown.update(word[:i] + c + word[i + 1:] for c in alphabet)
+                grown.update(word[:i] + c + word[i:] for c in alphabet)
+        grown.discard('')
+        frontier = grown - variants
+        variants |= grown
+    return variants
+
+
+class KeywordMatcher:
+    """
+    Compiled multi-keyword matcher. keywords are (keyword, label) pairs; a
+    label is reported for a text when any of its keywords occurs in it as a
+    substring (case-insensitive unless case_sensitive), or any of its edit
+    variants occurs as a whole word.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]], max_edits: int = 0,
+                 min_edit_length: int = MIN_EDIT_LENGTH, case_sensitive: bool = False):
+        self.case_sensitive = case_sensitive
+        patterns: Dict[bytes, Set[Tuple[Hashable, bool]]] = {}
+        for keyword, label in keywords:
+            keyword = keyword if case_sensitive else keyword.lower()
+            forms = edit_variants(keyword, max_edits) if max_edits and len(keyword) >= min_edit_length else {keyword}
+            for form in forms:
+                if form == keyword:
+                    patterns.setdefault(form.encode('utf-8'), set()).add((label, False))
+                elif len(form) >= min_edit_length:
+                    patterns.setdefault(form.encode('utf-8'), set()).add((label, True))
+        self.pattern_count = len(patterns)
+        self._compile(patterns)
+
+    def _compile(self, patterns: Dict[bytes, Set[Tuple[Hashable, bool]]]):
+        # Trie of all patterns; whole-word patterns keep their length to find where they start
+        goto: List[Dict[int, int]] = [{}]
+        outputs: List[Set[Hashable]] = [set()]
+        words: List[Set[Tuple[Hashable, int]]] = [set()]
+        for pattern, labels in patterns.items():
+            state = 0
+            for byte in pattern:
+                if byte not in goto[state]:
+                    goto[state][byte] = len(goto)
+                    goto.append({})
+                    outputs.append(set())
+                    words.append(set())
+                state = goto[state][byte]
+            for label, whole_word in labels:
+                if whole_word:
+                    words[state].add((label, len(pattern)))
+                else:
+                    outputs[state].add(label)
+
+        # Bytes used by any pattern get their own column; all others share column 0
+        alphabet = sorted({byte for pattern in patterns for byte in pattern})
+        self.byte_class = np.zeros(256, dtype=np.int64)
+        self.byte_class[alphabet] = np.arange(1, len(alphabet) + 1)
+        self.columns = len(alphabet) + 1
+
+        # Breadth-first: each state's row starts as its failure state's row, then its own edges
+        table = np.zeros((len(goto), self.columns), dtype=np.int32)
+        fail = [0] * len(goto)
+        queue = deque()
+        for byte, child in goto[0].items():
+            table[0, self.byte_class[byte]] = child
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            outputs[state] |= outputs[fail[state]]
+            words[state] |= words[fail[state]]
+            table[state] = table[fail[state]]
+            for byte, child in goto[state].items():
+                column = self.byte_class[byte]
+                fail[child] = table[fail[state], column] if state else 0
+                table[state, column] = child
+                queue.append(child)
+
+        self.transitions = table.ravel()
+        self.accepting = np.array([bool(labels) for labels in outputs])
+        self.outputs = [frozenset(labels) for labels in outputs]
+        self.word_accepting = np.array([bool(labels) for labels in words])
+        self.word_outputs = [frozenset(labels) for labels in words]
+
+    @property
+    def states(self) -> int:
+        return len(self.outputs)
+
+    def scan(self, texts: Sequence[str]) -> List[Set[Hashable]]:
+        """Labels found in each text, in input order."""
+        encoded = [(text if self.case_sensitive else text.lower()).encode('utf-8') for text in texts]
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))  # similar lengths pad less
+        results: List[Set[Hashable]] = [set() for _ in texts]
+
+        start = 0
+        while start < len(order):
+            end = start + 1
+            while end < len(order) and (end - start + 1) * max(len(encoded[order[end]]), 1) <= MAX_BATCH_CELLS:
+                end += 1
+            batch = order[start:end]
+            width = max(len(encoded[i]) for i in batch)
+            if width:
+                chars = np.zeros((width, len(batch)), dtype=np.uint8)
+                for col, i in enumerate(batch):
+                    chars[:len(encoded[i]), col] = np.frombuffer(encoded[i], dtype=np.uint8)
+                columns = self.byte_class[chars]  # padding is byte 0, which no keyword uses
+
+                visited = np.empty((width, len(batch)), dtype=np.int32)
+                state = np.zeros(len(batch), dtype=np.int64)
+                for position in range(width):
+                    state = self.transitions[state * self.columns + columns[position]]
+                    visited[position] = state
+
+                position, col = np.nonzero(self.accepting[visited])
+                hits = np.unique(col.astype(np.int64) * self.states + visited[position, col])
+                for key in hits.tolist():
+                    col, state = divmod(key, self.states)
+                    results[batch[col]].update(self.outputs[state])
+
+                # Edit variants are rare hits; check their word boundaries one by one
+                position, col = np.nonzero(self.word_accepting[visited])
+                for last, col, state in zip(position.tolist(), col.tolist(), visited[position, col].tolist()):
+                    text, found = encoded[batch[col]], results[batch[col]]
+                    for label, length in self.word_outputs[state]:
+                        if label not in found and _whole_word(text, last + 1 - length, last + 1):
+                            found.add(label)
+            start = end
+        return results
+
+    def labels_in(self, text: str) -> Set[Hashable]:
+        return self.scan([text])[0]
+
+
+def _whole_word(text: bytes, start: int, end: int) -> bool:
+    """True when text[start:end] has nothing alphanumeric directly before or after it."""
+    return not text[start - 1:start].isalnum() and not text[end:end + 1].isalnum()
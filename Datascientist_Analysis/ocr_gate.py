@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - OCR Gate
+Cheap pre-filter that decides whether a photo is worth running Tesseract on.
+
+A grayscale probe is decoded at reduced resolution (JPEG draft mode) and cut
+into 16px tiles. A tile looks like text when it holds several strong rising
+AND falling horizontal edges - the stroke pairs printed letters make on any
+background. Photos with fewer text-like tiles than the mode's minimum skip OCR.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Gate modes: name -> (probe short side in px, minimum text-like tiles).
+# Larger probes keep small print visible; lower minimums skip fewer photos.
+OCR_GATE_MODES: Dict[str, Optional[Tuple[int, int]]] = {
+    'off': None,  # always run OCR
+    'recall': (1024, 1),  # only skip photos with no crisp stroke pairs at all
+    'balanced': (1024, 5),
+    'speed': (640, 10),  # may miss small print on busy photos
+}
+
+GATE_TILE = 16  # Tile size in probe pixels
+GATE_EDGE = 100  # Minimum step between neighbouring pixels (0-255) for a stroke edge
+GATE_STROKES = 12  # Rising and falling stroke edges each needed for a text-like tile
+
+
+def count_text_tiles(gray: np.ndarray) -> int:
+    """Number of text-like tiles in a grayscale probe array."""
+    steps = np.diff(gray.astype(np.int16), axis=1)
+    rows = (steps.shape[0] // GATE_TILE) * GATE_TILE
+    cols = (steps.shape[1] // GATE_TILE) * GATE_TILE
+    tiles = steps[:rows, :cols].reshape(rows // GATE_TILE, GATE_TILE, cols // GATE_TILE, GATE_TILE)
+
+    rising = (tiles > GATE_EDGE).sum(axis=(1, 3))
+    falling = (tiles < -GATE_EDGE).sum(axis=(1, 3))
+    return int(((rising >= GATE_STROKES) & (falling >= GATE_STROKES)).sum())
+
+
+def text_tile_count(image_path: str, probe_size: int) -> int:
+    """Number of text-like tiles in a reduced-resolution grayscale probe."""
+    with Image.open(image_path) as img:
+        img.draft('L', (probe_size, probe_size))
+        gray = img.convert('L')
+        factor = min(gray.size) // probe_size
+        if factor > 1:
+            gray = gray.reduce(factor)
+        return count_text_tiles(np.asarray(gray))
+
+
+def should_run_ocr(image_path: str, mode: str = 'recall') -> bool:
+    """True when the photo may contain text (always True for mode 'off')."""
+    if mode not in OCR_GATE_MODES:
+        raise ValueError(f"Unknown OCR gate mode '{mode}'. Choose from: {', '.join(OCR_GATE_MODES)}")
+
+    setting = OCR_GATE_MODES[mode]
+    if setting is None:
+        return True
+
+    probe_size, min_tiles = setting
+    try:
+        return text_tile_count(image_path, probe_size) >= min_tiles
+    except Exception:
+        # Can't probe it, so let OCR have a go
+        return True
+
+
+class OCRGateStats:
+    """Tally of gate decisions and OCR time, for the end-of-run report."""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.ocr_runs = 0
+        self.skipped = 0
+        self.ocr_seconds = 0.0
+        self.gate_seconds = 0.0
+
+    def record(self, ran_ocr: bool, ocr_seconds: float = 0.0, gate_seconds: float = 0.0):
+        if ran_ocr:
+            self.ocr_runs += 1
+            self.ocr_seconds += ocr_seconds
+        else:
+            self.skipped += 1
+        self.gate_seconds += gate_seconds
+
+    def time_saved(self) -> Optional[float]:
+        """Estimated seconds saved: skipped photos x mean OCR time, less the gate's own cost."""
+        if not self.ocr_runs:
+            return None
+        return self.skipped * self.ocr_seconds / self.ocr_runs - self.gate_seconds
+
+    def summary(self) -> str:
+        saved = self.time_saved()
+        saved_text = f"~{saved:.1f}s saved" if saved is not None else "time saved unknown (no OCR ran)"
+        return (f"OCR gate ({self.mode}): {self.ocr_runs} OCR calls, {self.skipped} skipped, "
+                f"{saved_text}, gate cost {self.gate_seconds:.1f}s")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Photo Deduplication
+Groups near-duplicate photos (copies, re-encodes, resized or slightly
+retouched versions of one shot) so each group is analyzed once.
+
+Every photo gets a 64-bit difference hash (dHash) from a tiny grayscale
+decode (byte-identical copies are matched by content hash first and
+never decoded). With an IngestCache, dHashes are stored by content hash, so
+unchanged photos aren't decoded again on later runs. Cluster representatives are kept in a BK-tree, so finding the
+nearest earlier representative within a Hamming distance touches only a
+small part of the gallery instead of comparing against every photo. Each
+finished cluster is then keyed by its canonical photo: the shortest file
+name that doesn't look like a copy ("IMG_1.jpg" over "IMG_1 - Copy (2).jpg").
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from image_ingest import IngestCache, content_hashes
+
+HASH_SIZE = 8  # dHash grid: HASH_SIZE x HASH_SIZE bits
+DUPLICATE_DISTANCE = 6  # Max differing bits for two photos to count as duplicates
+COPY_SUFFIX = re.compile(r'(\s*-\s*copy(\s*\(\d+\))?|\s+copy(\s+\d+)?|\s*\(\d+\))$', re.IGNORECASE)  # "x - Copy (2)", "x copy 3", "x (1)"
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def perceptual_hash(image_path: str, hash_size: int = HASH_SIZE) -> int:
+    """
+    dHash: shrink to (hash_size + 1) x hash_size grayscale and set one bit
+    per pixel that is brighter than its right-hand neighbour.
+    """
+    with Image.open(image_path) as img:
+        img.draft('L', (hash_size * 8, hash_size * 8))
+        gray = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(gray, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+
+def canonical_rank(image_path: str) -> Tuple[bool, int]:
+    """Sort key that puts original-looking, shorter file names first."""
+    name = os.path.basename(image_path)
+    return COPY_SUFFIX.search(os.path.splitext(name)[0]) is not None, len(name)
+
+
+def _safe_hash(image_path: str) -> Optional[int]:
+    try:
+        return perceptual_hash(image_path)
+    except Exception:
+        return None
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over Hamming distance. Children hang off each node
+    by their distance to it, so a search within max_distance of a query only
+    descends into children whose edge distance is within max_distance of the
+    query's distance to the node (triangle inequality).
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, item, {distance: child node}]
+        self.size = 0
+
+    def add(self, hash_value: int, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [hash_value, item, {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, item, {}]
+                return
+            node = child
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """(distance, item) for every entry within max_distance, nearest first."""
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[1]))
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return sorted(matches, key=lambda match: match[0])
+
+
+def iter_hashes(image_paths: Sequence[str], workers: int = 1) -> Iterator[Tuple[str, Optional[int]]]:
+    """(path, dHash) in input order; the hash is None for photos that can't be decoded."""
+    if workers <= 1:
+        for path in image_paths:
+            yield path, _safe_hash(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from zip(image_paths, pool.map(_safe_hash, image_paths, chunksize=8))
+
+
+def cluster_duplicates(image_paths: Sequence[str], max_distance: int = DUPLICATE_DISTANCE,
+                       workers: int = 1, digests: Optional[Dict[str, str]] = None,
+                       cache: Optional[IngestCache] = None) -> Dict[str, List[str]]:
+    """
+    Map each cluster's representative to its members, representative first.
+    A photo joins the nearest earlier cluster within max_distance bits,
+    otherwise it starts a cluster. Photos that can't be hashed stay on their
+    own. The representative is the member with the lowest canonical_rank
+    (ties go to image_paths order), so it doesn't depend on how copies sort.
+
+    digests are the photos' content hashes if already computed
+    (image_ingest.content_hashes); dHashes found in cache are reused and new
+    ones are stored there.
+    """
+    order = {path: i for i, path in enumerate(image_paths)}
+    digests = content_hashes(image_paths) if digests is None else digests
+    copies: Dict[str, List[str]] = {}  # first file with some content -> every file with it
+    first_by_content: Dict[str, str] = {}
+    for path in image_paths:
+        first = first_by_content.setdefault(digests[path], path) if path in digests else path
+        copies.setdefault(first, []).append(path)
+
+    known = cache.get_perceptual_hashes((digests[p] for p in copies if p in digests), HASH_SIZE) if cache else {}
+    computed = dict(iter_hashes([p for p in copies if digests.get(p) not in known], workers))
+    if cache:
+        cache.put_perceptual_hashes({digests[p]: (value, p) for p, value in computed.items()
+                                     if value is not None and p in digests}, HASH_SIZE)
+
+    clusters: Dict[str, List[str]] = {}
+    tree = BKTree()
+    for path in copies:
+        hash_value = known[digests[path]] if digests.get(path) in known else computed[path]
+        matches = tree.search(hash_value, max_distance) if hash_value is not None else []
+        if matches:
+            clusters[matches[0][1]].extend(copies[path])
+        else:
+            clusters[path] = list(copies[path])
+            if hash_value is not None:
+                tree.add(hash_value, path)
+
+    canonical = {}
+    for members in clusters.values():
+        members.sort(key=lambda path: (canonical_rank(path), order[path]))
+        canonical[members[0]] = members[:1] + sorted(members[1:], key=order.get)
+    return canonical
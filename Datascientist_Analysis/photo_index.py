@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Photo Index
+Player -> photos map for a batch of photos, built from their filenames and
+OCR text in one pass per source rather than one scan per player.
+
+Photo names run words together ("akhilreddydanda_holdingcup"), so a player's
+name tokens are matched as substrings: every name token of the roster goes
+into one Aho-Corasick automaton (keyword_matcher) and all filenames are
+scanned through it once. OCR text keeps the fuzzy rule (partial_ratio of
+the full name against the text) but scores every player against every
+distinct text in one rapidfuzz cdist call.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Sequence, Set
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from keyword_matcher import KeywordMatcher
+
+OCR_MATCH_THRESHOLD = 70  # partial_ratio a player's name needs against a photo's OCR text
+MIN_TOKEN_LENGTH = 3  # Shorter name tokens ("Y", "01") are not looked up in filenames
+
+
+def name_tokens(player: str) -> List[str]:
+    """Lowercase tokens of a player's name that are matched against filenames."""
+    return [token for token in player.lower().split() if len(token) >= MIN_TOKEN_LENGTH]
+
+
+class PlayerPhotoMatcher:
+    """
+    Filenames and OCR text by photo id, matched against every player at once
+    by player_photos. Nothing is persisted here; cricket_stats_analyzer stores
+    the resulting map in photo_players.json.
+    """
+
+    def __init__(self):
+        self.filenames: List[str] = []
+        self.ocr_texts: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def add(self, filename: str, ocr_text: str = "") -> int:
+        """Index one photo; returns its id (ids count up from 0 in add order)."""
+        photo_id = len(self.filenames)
+        self.filenames.append(filename)
+        self.ocr_texts.append(ocr_text or "")
+        return photo_id
+
+    def player_photos(self, whitelist: Sequence[str], threshold: int = OCR_MATCH_THRESHOLD,
+                      workers: int = -1) -> Dict[str, List[int]]:
+        """
+        Player -> sorted ids of photos showing them: any name token in the
+        filename, or the full name fuzzy-matching the OCR text.
+        """
+        text_ids: Dict[str, List[int]] = defaultdict(list)
+        for photo_id, text in enumerate(self.ocr_texts):
+            if text:
+                text_ids[text].append(photo_id)
+        texts = list(text_ids)
+        if texts and whitelist:
+            scores = process.cdist(list(whitelist), texts, scorer=fuzz.partial_ratio,
+                                   score_cutoff=threshold, workers=workers)
+        else:
+            scores = np.zeros((len(whitelist), 0))
+
+        # One pass over all filenames finds every player with a name token in them
+        token_matcher = KeywordMatcher([(token, player) for player in whitelist for token in name_tokens(player)])
+        by_filename: Dict[str, Set[int]] = defaultdict(set)
+        for photo_id, players in enumerate(token_matcher.scan(self.filenames)):
+            for player in players:
+                by_filename[player].add(photo_id)
+
+        result = {}
+        for row, player in enumerate(whitelist):
+            ids = set(by_filename.get(player, ()))
+            for col in np.flatnonzero(scores[row] >= threshold):
+                ids.update(text_ids[texts[col]])
+            result[player] = sorted(ids)
+        return result
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Cricket Statistics Analyzer - Stage Graph
+Runs a pipeline declared as named stages and the stages they depend on.
+Each stage starts as soon as its dependencies finish, so independent stages
+overlap and the run takes as long as its longest dependency chain instead
+of the sum of all stages.
+
+Stages run on one of three executors:
+- 'thread': a worker thread, for file I/O and for work that releases the
+  GIL (pandas/numpy, rapidfuzz, PIL, tesseract, stages that drive their own
+  process pools)
+- 'process': a process pool, for pure-Python CPU work; the function, its
+  inputs and its result must be picklable. With processes=1 these stages
+  run on threads instead
+- 'main': the main thread, one stage at a time, for pyplot, which is not
+  thread-safe, and for objects tied to the main thread such as SQLite
+  connections. The event loop runs on a helper thread meanwhile, so other
+  stages keep starting and finishing while a main-thread stage runs
+
+With concurrent=False every stage runs on the main thread, one at a time
+in the order added, as a plain script would (and as a profiler needs).
+Each stage is also recorded as an instrumentation span named
+'stage.<name>' when a run is being instrumented; process stages record
+theirs in the worker and send them back with the result.
+
+After a run, timings holds each stage's start and end (seconds from the
+start of the run) and report() lists them with the critical path: the
+dependency chain with the largest total stage time, which sets the
+run's wall time.
+"""
+
+import os
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from instrumentation import active_run, end_run, span, start_run
+
+STAGE_KINDS = ('thread', 'process', 'main')
+
+
+def _timed_call(name: str, func: Callable, *args) -> Tuple[Any, float, float]:
+    """(result, start, end); timed where the stage runs, not when its completion reaches the event loop."""
+    with span(f"stage.{name}"):
+        start = time.perf_counter()
+        result = func(*args)
+        end = time.perf_counter()
+    return result, start, end
+
+
+def _timed_call_in_process(name: str, func: Callable, instrument: bool, *args) -> Tuple[Any, float, float, Dict]:
+    """
+    _timed_call in a pool process, plus the spans recorded there (the stage's
+    and its steps') when the parent is instrumenting, to merge into its run.
+    """
+    if not instrument:
+        return _timed_call(name, func, *args) + ({},)
+    start_run()
+    try:
+        timed = _timed_call(name, func, *args)
+    finally:
+        run = end_run()
+    return timed + (run.spans,)
+
+
+class MainThreadExecutor(Executor):
+    """Runs submitted calls one at a time on the thread that calls serve()."""
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        self.jobs.put((future, fn, args, kwargs))
+        return future
+
+    def serve(self):
+        """Run jobs until stop() is called."""
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            future, fn, args, kwargs = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+    def stop(self):
+        self.jobs.put(None)
+
+
+class StageGraph:
+    """
+    Stages are added in dependency order: a stage can only depend on stages
+    added before it, so the graph can't have cycles. inputs are stages
+    whose results are passed to func as positional arguments, in order;
+    after are stages that must finish first but whose results func doesn't
+    take.
+    """
+
+    def __init__(self, concurrent: bool = True, processes: int = 1):
+        self.concurrent = concurrent
+        self.processes = processes or os.cpu_count() or 1
+        self.stages: Dict[str, Dict] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.wall_seconds = 0.0
+
+    def add(self, name: str, func: Callable, inputs: Sequence[str] = (), after: Sequence[str] = (),
+            kind: str = 'thread') -> 'StageGraph':
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unknown stage kind '{kind}'. Choose from: {', '.join(STAGE_KINDS)}")
+        unknown = [dep for dep in list(inputs) + list(after) if dep not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on undefined stages: {', '.join(unknown)}")
+        self.stages[name] = {'func': func, 'inputs': list(inputs),
+                             'deps': list(dict.fromkeys(list(inputs) + list(after))), 'kind': kind}
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every stage once and return their results by name. If a stage
+        raises, stages that haven't started are cancelled, the ones already
+        running are waited for, and its exception is re-raised.
+        """
+        self.results = {}
+        self.timings = {}
+        main_thread = MainThreadExecutor()
+        outcome = {}
+
+        def drive():
+            try:
+                outcome['results'] = asyncio.run(self._run(main_thread))
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                main_thread.stop()
+
+        driver = threading.Thread(target=drive, name='stage-graph', daemon=True)
+        driver.start()
+        main_thread.serve()
+        driver.join()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['results']
+
+    async def _run(self, main_thread: Executor) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        threads = ThreadPoolExecutor(thread_name_prefix='stage')
+        use_processes = self.concurrent and self.processes > 1 and any(s['kind'] == 'process' for s in self.stages.values())
+        processes = ProcessPoolExecutor(max_workers=self.processes) if use_processes else None
+        tasks: Dict[str, asyncio.Future] = {}
+        start = time.perf_counter()
+
+        async def run_stage(name: str, stage: Dict):
+            if stage['deps']:
+                await asyncio.gather(*(tasks[dep] for dep in stage['deps']))
+            args = [self.results[dep] for dep in stage['inputs']]
+            if stage['kind'] == 'main' or not self.concurrent:
+                executor = main_thread
+            else:
+                executor = processes if stage['kind'] == 'process' and processes else threads
+            if executor is processes:
+                run = active_run()
+                result, stage_start, stage_end, spans = await loop.run_in_executor(
+                    executor, _timed_call_in_process, name, stage['func'], run is not None, *args)
+                if run is not None:
+                    run.merge(spans)
+            else:
+                result, stage_start, stage_end = await loop.run_in_executor(executor, _timed_call, name,
+                                                                            stage['func'], *args)
+            self.results[name] = result
+            self.timings[name] = {'start': stage_start - start, 'end': stage_end - start,
+                                  'seconds': stage_end - stage_start}
+
+        try:
+            if not self.concurrent:
+                for name, stage in self.stages.items():
+                    tasks[name] = asyncio.ensure_future(run_stage(name, stage))
+                    await tasks[name]
+            else:
+                for name, stage in self.stages.items():
+                    tasks[name] = asyncio.ensure_future(run_stage(name, stage))
+                await asyncio.wait(list(tasks.values()), return_when=asyncio.FIRST_EXCEPTION)
+                for task in tasks.values():
+                    task.cancel()
+                for task in tasks.values():
+                    if task.done() and not task.cancelled() and task.exception():
+                        raise task.exception()
+        finally:
+            self.wall_seconds = time.perf_counter() - start
+            # Let the cancellations reach the pools, then wait for stages already
+            # running there so none is still writing output after run() raises
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            threads.shutdown(wait=True)
+            if processes:
+                processes.shutdown(wait=True)
+        return self.results
+
+    def critical_path(self) -> List[str]:
+        """Stages of the dependency chain with the largest total time, first stage first."""
+        finish: Dict[str, float] = {}
+        previous: Dict[str, str] = {}
+        for name, stage in self.stages.items():
+            prior = max(stage['deps'], key=finish.get, default=None)
+            previous[name] = prior
+            finish[name] = self.timings[name]['seconds'] + (finish[prior] if prior else 0.0)
+        path = []
+        name = max(finish, key=finish.get, default=None)
+        while name:
+            path.append(name)
+            name = previous[name]
+        return path[::-1]
+
+    def summary(self) -> Dict:
+        """Wall time, critical path and per-stage timings, rounded for JSON."""
+        return {
+            'concurrent': self.concurrent,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'critical_path': self.critical_path(),
+            'stages': {name: {'kind': stage['kind'],
+                              **{key: round(value, 4) for key, value in self.timings[name].items()}}
+                       for name, stage in self.stages.items()},
+        }
+
+    def report(self) -> List[str]:
+        """Timing lines for logging: one per stage (critical path marked *), then totals."""
+        path = self.critical_path()
+        busy = sum(timing['seconds'] for timing in self.timings.values())
+        width = max((len(name) for name in self.stages), default=0)
+        lines = []
+        for name, stage in self.stages.items():
+            timing = self.timings[name]
+            marker = '*' if name in path else ' '
+            lines.append(f"{marker} {name:<{width}}  {stage['kind']:<7} {timing['start']:8.2f}s -> "
+                         f"{timing['end']:8.2f}s  {timing['seconds']:8.2f}s")
+        lines.append(f"Critical path ({sum(self.timings[name]['seconds'] for name in path):.2f}s): "
+                     f"{' -> '.join(path)}")
+        lines.append(f"Wall time {self.wall_seconds:.2f}s for {busy:.2f}s of stage time "
+                     f"({busy / max(self.wall_seconds, 1e-9):.1f}x overlap)")
+        return lines
@@ -16,7 +16,10 @@
 """
 
 import os
-import glob
+import sys
+import time
+import zlib
+import struct
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -24,44 +27,297 @@ import matplotlib.patches as mpatches
 from matplotlib.gridspec import GridSpec
 import seaborn as sns
 from PIL import Image, ImageDraw, ImageFont
-import pytesseract
 from collections import Counter, defaultdict
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared helpers live alongside the stats analyzer
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Datascientist_Analysis'))
+from ocr_gate import OCR_GATE_MODES, OCRGateStats
+from image_derivatives import manifest_key, update_manifest
+from image_ingest import (COLOR_SAMPLE_SIZE, TESSERACT_AVAILABLE, IngestCache, content_hashes, find_images,
+                          ingest_image, iter_ingest)
+from photo_dedup import DUPLICATE_DISTANCE, cluster_duplicates
+from keyword_matcher import KeywordMatcher
+from stage_graph import StageGraph
+from instrumentation import add_count, end_run, instrumented, start_run
+from photo_classifier import (CLASSIFIER_BATCH, FEATURE_EXTRACTORS, PhotoClassifier, leave_one_out_predictions,
+                              load_batch, load_labels, train_classifier)
+
 # Set style for professional outputs
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
+
+# Photo categories based on user description
+CATEGORY_DESCRIPTIONS = {
+    'team_celebration': "Team group photo or celebration",
+    'trophy_ceremony': "Trophy ceremony or award presentation",
+    'ccpl_runners_up': "CCPL runner-up presentation",
+    'individual_awards': "Individual player with trophy/award",
+    'action_shots': "Cricket action shot",
+    'pitch_inspection': "Pitch inspection or practice session",
+    'parties_social': "Team party or social gathering",
+    'restaurant_meetings': "Team meeting at a restaurant",
+    'zimbabwe_captain': "With former Zimbabwe captain Elton Chigumbura",
+    'san_antonio_league': "San Antonio league squad photo",
+    'leaderboard': "League standings or points table",
+    'prize_distribution': "Prize distribution",
+    'man_of_match': "Man of the Match award",
+    'other': "Team moment or cricket scene",
+}
+
+# OCR keywords, checked in this order: the first category with a keyword in the text wins
+CATEGORY_KEYWORDS = [
+    ('trophy_ceremony', ('trophy', 'runner', 'ccpl')),
+    ('man_of_match', ('man of', 'award')),
+    ('leaderboard', ('leaderboard', 'points', 'table')),
+]
+
+PHOTO_LABELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'photo_labels.csv')
+
+
+def category_keyword_matcher(max_edits=0):
+    """
+    One automaton over every category keyword; max_edits > 0 also accepts
+    OCR misreads of the longer keywords (see keyword_matcher).
+    """
+    return KeywordMatcher([(keyword, category) for category, keywords in CATEGORY_KEYWORDS
+                           for keyword in keywords], max_edits=max_edits)
+
+
+CATEGORY_MATCHER = category_keyword_matcher()
+
+
+def categorize_image(record, category=None, keyword_matcher=CATEGORY_MATCHER):
+    """
+    Categorize one photo from its ingestion record (dimensions, mean color,
+    OCR text - see image_ingest.ingest_image).
+    
+    category is a classifier's prediction for the photo; it replaces the
+    aspect-ratio and color rules, but OCR keywords still take precedence.
+    The OCR text is scanned once for all keywords by keyword_matcher.
+    """
+    width, height = record['width'], record['height']
+    aspect_ratio = width / height
+    avg_color = record['mean_color']
+    text = record['ocr_text']
+    found = keyword_matcher.labels_in(text) if text else set()
+    keyword_category = next((c for c, _ in CATEGORY_KEYWORDS if c in found), None)
+    
+    # Trophy, award and standings text outranks anything seen in the pixels
+    if keyword_category is not None:
+        category = keyword_category
+    elif category is not None:
+        pass
+    # Group photos tend to have landscape orientation and multiple people
+    elif aspect_ratio > 1.3:
+        category = 'team_celebration'
+    # Portrait images likely individual awards or action shots
+    elif aspect_ratio < 0.9:
+        if avg_color[0] > 150 or avg_color[1] > 150:  # Bright colors
+            category = 'individual_awards'
+        else:
+            category = 'action_shots'
+    else:
+        category = 'other'
+    description = CATEGORY_DESCRIPTIONS[category]
+    
+    return {
+        'path': record['path'],
+        'name': record['filename'],
+        'category': category,
+        'description': description,
+        'width': width,
+        'height': height,
+        'aspect_ratio': aspect_ratio,
+        'extracted_text': text[:200] if text else "No text detected",
+        'size_mb': record['size_mb']
+    }
+
+
+def analyze_image_file(image_path, fast_decode=True, ocr_gate='recall'):
+    """
+    Ingest and categorize one photo.
+    
+    fast_decode samples color from a reduced-resolution decode instead of
+    the full-size pixel array; OCR always sees the full-resolution image.
+    ocr_gate is the ocr_gate mode deciding whether OCR runs at all.
+    """
+    record = ingest_image(image_path, fast_decode=fast_decode, ocr_gate=ocr_gate)
+    if record.get('error'):
+        print(f"⚠ Error analyzing {record['filename']}: {record['error']}")
+        return None
+    return categorize_image(record)
+
+
+class StreamingPNGWriter:
+    """
+    Writes an RGB PNG a band of rows at a time, so a tall image never has to
+    exist in memory at once. Rows use the PNG 'Sub' filter, which compresses
+    photos far better than unfiltered rows.
+    """
+    
+    def __init__(self, path, width, height):
+        self.width = width
+        self.f = open(path, 'wb')
+        self.f.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        self.compressor = zlib.compressobj(6)
+    
+    def _chunk(self, kind, data):
+        self.f.write(struct.pack('>I', len(data)) + kind + data)
+        self.f.write(struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+    
+    def write_band(self, band):
+        """Append an RGB image exactly `width` pixels wide"""
+        rows = np.asarray(band.convert('RGB'), dtype=np.uint8).reshape(band.height, self.width * 3)
+        filtered = rows.copy()
+        filtered[:, 3:] -= rows[:, :-3]  # Sub filter: each byte minus the same channel one pixel left
+        lines = np.hstack([np.ones((band.height, 1), dtype=np.uint8), filtered])
+        data = self.compressor.compress(lines.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+    
+    def close(self):
+        self._chunk(b'IDAT', self.compressor.flush())
+        self._chunk(b'IEND', b'')
+        self.f.close()
+
+
+def _load_font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size default font
+        return ImageFont.load_default()
+
+
+def photo_thumbnail(image_path, size):
+    """RGB thumbnail fitting a size x size box, decoded at reduced resolution (JPEG draft mode)"""
+    with Image.open(image_path) as img:
+        img.draft('RGB', (size, size))
+        img = img.convert('RGB')
+    img.thumbnail((size, size))
+    return img
+
+
+def compose_contact_sheets(photos, output_stem, cols=4, rows_per_page=10, tile_size=400,
+                           title='Islanders Cricket Club - Photo Gallery'):
+    """
+    Paste photo thumbnails into paginated contact sheets, one tile row at a
+    time: each row is composed, written to the PNG and dropped, so memory
+    stays at one row of thumbnails however big the gallery is.
+    
+    photos are photo_analysis dicts; pages are written to output_stem.png,
+    output_stem_2.png, ... Returns the page paths. Photos standing in for a
+    cluster of near-duplicates are captioned with the number hidden.
+    """
+    caption_h = 44
+    header_h = 70
+    tile_h = tile_size + caption_h
+    width = cols * tile_size
+    per_page = cols * rows_per_page
+    n_pages = max((len(photos) + per_page - 1) // per_page, 1)
+    title_font = _load_font(32)
+    caption_font = _load_font(14)
+    pages = []
+    
+    for page in range(n_pages):
+        page_photos = photos[page * per_page:(page + 1) * per_page]
+        n_rows = (len(page_photos) + cols - 1) // cols
+        path = f"{output_stem}.png" if page == 0 else f"{output_stem}_{page + 1}.png"
+        writer = StreamingPNGWriter(path, width, header_h + n_rows * tile_h)
+        
+        header = Image.new('RGB', (width, header_h), 'white')
+        heading = title if n_pages == 1 else f"{title} ({page + 1}/{n_pages})"
+        ImageDraw.Draw(header).text((width // 2, header_h // 2), heading, fill='black',
+                                    font=title_font, anchor='mm')
+        writer.write_band(header)
+        
+        for row_start in range(0, len(page_photos), cols):
+            band = Image.new('RGB', (width, tile_h), 'white')
+            draw = ImageDraw.Draw(band)
+            for col, photo_info in enumerate(page_photos[row_start:row_start + cols]):
+                x = col * tile_size
+                try:
+                    thumb = photo_thumbnail(photo_info['path'], tile_size - 10)
+                    band.paste(thumb, (x + (tile_size - thumb.width) // 2, (tile_size - thumb.height) // 2))
+                except Exception:
+                    draw.text((x + tile_size // 2, tile_size // 2), 'Error loading image', fill='gray',
+                              font=caption_font, anchor='mm')
+                caption = photo_info['category'].replace('_', ' ').title()
+                if photo_info.get('cluster_size', 1) > 1:
+                    caption += f" (+{photo_info['cluster_size'] - 1} similar)"
+                caption += f"\n{photo_info['name'][:20]}"
+                draw.multiline_text((x + tile_size // 2, tile_size + 2), caption, fill='black',
+                                    font=caption_font, anchor='ma', align='center')
+            writer.write_band(band)
+        
+        writer.close()
+        pages.append(path)
+    
+    return pages
+
+
 class IslandersCricketAnalytics:
     """
     Main analytics engine for Islanders Cricket Club
     """
     
-    def __init__(self, project_path="/mnt/project"):
-        """Initialize the analytics engine"""
+    def __init__(self, project_path="/mnt/project", workers=1, max_in_flight=None, cache_path="",
+                 fast_decode=True, ocr_gate='recall', dedup_distance=None, classifier=None,
+                 keyword_edits=0, concurrent_stages=True, metrics_path="", profile_path=None,
+                 site_images_dir=None):
+        """
+        Initialize the analytics engine
+        
+        workers > 1 analyzes photos on a process pool; max_in_flight caps how
+        many photos are submitted at once (default 2 per worker).
+        cache_path is the SQLite image ingestion cache shared with the stats
+        analyzer ("" = default location in the output folder, None = no cache).
+        fast_decode samples color from a reduced-resolution decode.
+        ocr_gate skips OCR on photos unlikely to hold text: 'off', 'recall',
+        'balanced' or 'speed' (see ocr_gate.OCR_GATE_MODES).
+        dedup_distance is how many of the 64 perceptual-hash bits near-duplicate
+        photos may differ by; each cluster is analyzed once and shares its
+        canonical photo's category, so output can differ from analyzing every
+        photo (None = off, the default; photo_dedup.DUPLICATE_DISTANCE = 6).
+        classifier is a fitted photo_classifier.PhotoClassifier that replaces
+        the aspect-ratio and color rules (None = rules only).
+        keyword_edits lets OCR keywords of 5+ letters match with that many
+        typos ("tr0phy", "leaderbord"); 0 = exact.
+        concurrent_stages runs the contact sheet, category chart, reports and
+        timeline side by side once photos are categorized (False = in order).
+        metrics_path is where each run writes per-phase wall/CPU time, peak
+        RSS and counts as JSON ("" = run_metrics.json in the output folder,
+        None = off). profile_path adds a whole-run profile (.prof for
+        cProfile, .html for pyinstrument); profiled runs go phase by phase.
+        site_images_dir writes website variants (AVIF/WebP/JPEG and
+        manifest.json, as build_site_images.py) of the analyzed photos from
+        the same decode as the analysis (None = off).
+        """
         self.project_path = project_path
         self.output_path = "/mnt/user-data/outputs"
         os.makedirs(self.output_path, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight
+        self.fast_decode = fast_decode
+        if ocr_gate not in OCR_GATE_MODES:
+            raise ValueError(f"Unknown ocr_gate '{ocr_gate}'. Choose from: {', '.join(OCR_GATE_MODES)}")
+        self.ocr_gate = ocr_gate
+        self.dedup_distance = dedup_distance
+        self.classifier = classifier
+        self.keyword_matcher = category_keyword_matcher(keyword_edits) if keyword_edits else CATEGORY_MATCHER
+        self.concurrent_stages = concurrent_stages
+        self.metrics_path = os.path.join(self.output_path, 'run_metrics.json') if metrics_path == "" else metrics_path
+        self.profile_path = profile_path
+        self.site_images_dir = site_images_dir
+        if cache_path == "":
+            cache_path = os.path.join(self.output_path, 'image_ingest_cache.sqlite')
+        self.cache = IngestCache(cache_path) if cache_path else None
         
-        # Photo categories based on user description
-        self.photo_categories = {
-            'team_celebration': [],
-            'trophy_ceremony': [],
-            'ccpl_runners_up': [],
-            'individual_awards': [],
-            'action_shots': [],
-            'pitch_inspection': [],
-            'parties_social': [],
-            'restaurant_meetings': [],
-            'zimbabwe_captain': [],
-            'san_antonio_league': [],
-            'leaderboard': [],
-            'prize_distribution': [],
-            'man_of_match': [],
-            'other': []
-        }
+        self.photo_categories = {category: [] for category in CATEGORY_DESCRIPTIONS}
         
         # Key players for spotlight
         self.spotlight_players = {
@@ -82,27 +338,14 @@ class IslandersCricketAnalytics:
         print("║" + " "*18 + "Advanced Analytics Engine" + " "*35 + "║")
         print("╚" + "═"*78 + "╝\n")
         
+    @instrumented(items=lambda images, self: {'images': len(images)})
     def load_images(self):
         """Load and catalog all images from project"""
         print("\n📸 PHASE 1: Image Discovery & Cataloging")
         print("─" * 80)
         
         # Find all JPEG images
-        image_patterns = [
-            os.path.join(self.project_path, "*.jpeg"),
-            os.path.join(self.project_path, "*.jpg"),
-            os.path.join(self.project_path, "*.JPEG"),
-            os.path.join(self.project_path, "*.JPG")
-        ]
-        
-        all_images = []
-        for pattern in image_patterns:
-            all_images.extend(glob.glob(pattern))
-        
-        # Filter out directories
-        all_images = [img for img in all_images if os.path.isfile(img)]
-        
-        self.images = sorted(all_images)
+        self.images = find_images(self.project_path, extensions=('.jpeg', '.jpg'), recursive=False)
         self.team_stats['total_photos'] = len(self.images)
         
         print(f"✓ Found {len(self.images)} cricket photos")
@@ -111,80 +354,14 @@ class IslandersCricketAnalytics:
         
         return self.images
     
+    @instrumented()
     def analyze_image_content(self, image_path):
         """
         Advanced AI-powered image analysis to categorize and extract information
         """
-        try:
-            img = Image.open(image_path)
-            img_name = os.path.basename(image_path)
-            
-            # Convert to RGB if necessary
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Basic image properties
-            width, height = img.size
-            aspect_ratio = width / height
-            
-            # Color analysis for jersey/uniform detection
-            img_array = np.array(img)
-            avg_color = img_array.mean(axis=(0, 1))
-            
-            # Try OCR for text detection
-            try:
-                text = pytesseract.image_to_string(img)
-                text_lower = text.lower()
-            except:
-                text = ""
-                text_lower = ""
-            
-            # Categorization logic based on image analysis
-            category = 'other'
-            description = ""
-            
-            # Check for trophy/cup (usually metallic silver/gold colors and center-aligned)
-            if 'trophy' in text_lower or 'runner' in text_lower or 'ccpl' in text_lower:
-                category = 'trophy_ceremony'
-                description = "Trophy ceremony or award presentation"
-            elif 'man of' in text_lower or 'award' in text_lower:
-                category = 'man_of_match'
-                description = "Man of the Match award"
-            elif 'leaderboard' in text_lower or 'points' in text_lower or 'table' in text_lower:
-                category = 'leaderboard'
-                description = "League standings or points table"
-            # Group photos tend to have landscape orientation and multiple people
-            elif aspect_ratio > 1.3:
-                category = 'team_celebration'
-                description = "Team group photo or celebration"
-            # Portrait images likely individual awards or action shots
-            elif aspect_ratio < 0.9:
-                if avg_color[0] > 150 or avg_color[1] > 150:  # Bright colors
-                    category = 'individual_awards'
-                    description = "Individual player with trophy/award"
-                else:
-                    category = 'action_shots'
-                    description = "Cricket action shot"
-            else:
-                category = 'other'
-                description = "Team moment or cricket scene"
-            
-            return {
-                'path': image_path,
-                'name': img_name,
-                'category': category,
-                'description': description,
-                'width': width,
-                'height': height,
-                'aspect_ratio': aspect_ratio,
-                'extracted_text': text[:200] if text else "No text detected",
-                'size_mb': os.path.getsize(image_path) / (1024*1024)
-            }
-            
-        except Exception as e:
-            print(f"⚠ Error analyzing {os.path.basename(image_path)}: {str(e)}")
-            return None
+        return analyze_image_file(image_path, self.fast_decode, self.ocr_gate)
     
+    @instrumented()
     def categorize_all_photos(self):
         """Analyze and categorize all photos"""
         print("\n🔍 PHASE 2: AI-Powered Image Analysis & Categorization")
@@ -192,13 +369,83 @@ class IslandersCricketAnalytics:
         
         self.photo_analysis = []
         
-        for idx, img_path in enumerate(self.images, 1):
-            print(f"Analyzing image {idx}/{len(self.images)}: {os.path.basename(img_path)}", end='\r')
+        # Content hashes are read once, for both the duplicate check and the cache lookup
+        digests = content_hashes(self.images) if self.cache or self.dedup_distance is not None else {}
+        
+        # Near-duplicates share the analysis of their cluster's canonical photo
+        if self.dedup_distance is None:
+            self.photo_clusters = {path: [path] for path in self.images}
+        else:
+            self.photo_clusters = cluster_duplicates(self.images, self.dedup_distance, self.workers,
+                                                     digests=digests, cache=self.cache)
+            duplicates = len(self.images) - len(self.photo_clusters)
+            print(f"✓ Near-duplicates: {duplicates} photos match another shot, "
+                  f"{len(self.photo_clusters)} distinct photos to analyze")
+        
+        # Records stream back in self.images order; unchanged photos come from the cache
+        derivative_options = ({'derivatives_dir': self.site_images_dir, 'derivatives_root': self.project_path}
+                              if self.site_images_dir else {})
+        records = iter_ingest(list(self.photo_clusters), workers=self.workers,
+                              max_in_flight=self.max_in_flight, cache=self.cache, digests=digests,
+                              fast_decode=self.fast_decode, ocr_gate=self.ocr_gate, **derivative_options)
+        derivatives = {}
+        gate_stats = OCRGateStats(self.ocr_gate)
+        total = len(self.photo_clusters)
+        start = time.perf_counter()
+        analyses = {}
+        
+        def add_analyses(batch):
+            # One classifier call scores the whole batch
+            predictions = (self.classifier.classify_paths([r['path'] for r in batch]) if self.classifier
+                           else [None] * len(batch))
+            for record, predicted in zip(batch, predictions):
+                analysis = categorize_image(record, predicted, self.keyword_matcher)
+                members = self.photo_clusters[record['path']]
+                analysis['cluster_size'] = len(members)
+                analysis['duplicate_of'] = None
+                analyses[record['path']] = analysis
+                for path in members[1:]:
+                    analyses[path] = dict(analysis, path=path, name=os.path.basename(path),
+                                          size_mb=os.path.getsize(path) / (1024 * 1024),
+                                          duplicate_of=analysis['name'])
+        
+        batch = []
+        for n, record in enumerate(records, 1):
+            rate = n / (time.perf_counter() - start)
+            print(f"Analyzing image {n}/{total}: {record['filename']} ({rate:.1f} images/sec)", end='\r')
+            if record.get('error'):
+                print(f"⚠ Error analyzing {record['filename']}: {record['error']}")
+                continue
+            if not record['cached'] and record['ocr_status'] != 'off':
+                gate_stats.record(record['ocr_status'] != 'skipped', record['ocr_seconds'],
+                                  record['gate_seconds'])
+            if 'derivatives' in record:
+                # Every copy's manifest entry points at the representative's variants
+                for path in self.photo_clusters[record['path']]:
+                    derivatives[manifest_key(path, self.project_path)] = record['derivatives']
             
-            analysis = self.analyze_image_content(img_path)
-            if analysis:
-                self.photo_analysis.append(analysis)
-                self.photo_categories[analysis['category']].append(analysis)
+            batch.append(record)
+            if len(batch) == CLASSIFIER_BATCH:
+                add_analyses(batch)
+                batch = []
+        add_analyses(batch)
+        
+        for path in self.images:
+            if path in analyses:
+                self.photo_analysis.append(analyses[path])
+                self.photo_categories[analyses[path]['category']].append(analyses[path])
+        
+        add_count('images', len(self.images))
+        add_count('distinct_images', len(self.photo_clusters))
+        add_count('ocr_calls', gate_stats.ocr_runs)
+        add_count('ocr_skipped', gate_stats.skipped)
+        if self.cache:
+            print(f"\n✓ Photo cache: {self.cache.hits} reused, {self.cache.misses} analyzed")
+        if self.site_images_dir:
+            update_manifest(self.site_images_dir, derivatives)
+            print(f"\n✓ Website image variants for {len(derivatives)} photos: {self.site_images_dir}")
+        if gate_stats.ocr_runs or gate_stats.skipped:
+            print(f"\n✓ {gate_stats.summary()}")
         
         print("\n")
         print("✓ Photo Analysis Complete!\n")
@@ -207,12 +454,19 @@ class IslandersCricketAnalytics:
         print("📊 Category Distribution:")
         for category, photos in self.photo_categories.items():
             if photos:
-                print(f"   • {category.replace('_', ' ').title()}: {len(photos)} photos")
+                distinct = sum(1 for photo in photos if photo['duplicate_of'] is None)
+                suffix = f" ({distinct} distinct)" if distinct != len(photos) else ""
+                print(f"   • {category.replace('_', ' ').title()}: {len(photos)} photos{suffix}")
         
         return self.photo_analysis
     
-    def generate_photo_contact_sheet(self):
-        """Generate a contact sheet of all photos with categories"""
+    @instrumented(items=lambda pages, *args, **kwargs: {'pages': len(pages or [])})
+    def generate_photo_contact_sheet(self, cols=4, rows_per_page=10, tile_size=400):
+        """
+        Generate paginated contact sheets of all photos with categories
+        (rows_per_page x cols photos per page), showing one photo per
+        near-duplicate cluster. Returns the page paths.
+        """
         print("\n🎨 PHASE 3: Creating Photo Contact Sheet")
         print("─" * 80)
         
@@ -220,41 +474,17 @@ class IslandersCricketAnalytics:
             print("⚠ No photos to create contact sheet")
             return None
         
-        # Calculate grid dimensions
-        n_photos = len(self.photo_analysis)
-        cols = 4
-        rows = (n_photos + cols - 1) // cols
-        
-        # Create figure
-        fig = plt.figure(figsize=(20, rows * 4))
-        fig.suptitle('Islanders Cricket Club - Photo Gallery', 
-                     fontsize=24, fontweight='bold', y=0.995)
-        
-        for idx, photo_info in enumerate(self.photo_analysis[:40], 1):  # Limit to 40 photos
-            ax = plt.subplot(rows, cols, idx)
-            
-            try:
-                img = Image.open(photo_info['path'])
-                img.thumbnail((800, 800))
-                ax.imshow(img)
-                
-                # Add title with category
-                title = f"{photo_info['category'].replace('_', ' ').title()}\n{photo_info['name'][:20]}"
-                ax.set_title(title, fontsize=8, pad=5)
-                ax.axis('off')
-            except:
-                ax.text(0.5, 0.5, 'Error loading image', 
-                       ha='center', va='center')
-                ax.axis('off')
-        
-        plt.tight_layout()
-        output_file = os.path.join(self.output_path, 'photos_contact_sheet.png')
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        output_stem = os.path.join(self.output_path, 'photos_contact_sheet')
+        distinct = [photo for photo in self.photo_analysis if photo['duplicate_of'] is None]
+        pages = compose_contact_sheets(distinct, output_stem, cols=cols,
+                                       rows_per_page=rows_per_page, tile_size=tile_size)
         
-        print(f"✓ Contact sheet saved: {output_file}\n")
-        return output_file
+        for output_file in pages:
+            print(f"✓ Contact sheet saved: {output_file}")
+        print()
+        return pages
     
+    @instrumented()
     def create_photo_category_summary(self):
         """Create visual summary of photo categories"""
         print("\n📈 PHASE 4: Photo Category Analytics")
@@ -308,6 +538,7 @@ class IslandersCricketAnalytics:
         print(f"✓ Category analysis saved: {output_file}\n")
         return output_file
     
+    @instrumented()
     def generate_team_summary_report(self):
         """Generate comprehensive team summary report"""
         print("\n📝 PHASE 5: Generating Executive Summary Report")
@@ -611,6 +842,7 @@ With the current form in San Antonio League and strong team morale, Islanders Cr
         
         return md_file, html_file
     
+    @instrumented()
     def create_photo_timeline(self):
         """Create a visual timeline of photos"""
         print("\n🗓️ PHASE 6: Creating Photo Timeline Visualization")
@@ -662,19 +894,32 @@ With the current form in San Antonio League and strong team morale, Islanders Cr
         return output_file
     
     def run_complete_analysis(self):
-        """Execute complete analysis pipeline"""
+        """Execute complete analysis pipeline (closes the photo cache when done)"""
         print("\n" + "="*80)
         print(" "*25 + "STARTING COMPLETE ANALYSIS")
         print("="*80)
         
-        # Execute all phases
-        self.load_images()
-        self.categorize_all_photos()
-        
-        contact_sheet = self.generate_photo_contact_sheet()
-        category_analysis = self.create_photo_category_summary()
-        reports = self.generate_team_summary_report()
-        timeline = self.create_photo_timeline()
+        # Execute all phases: everything after categorization only reads
+        # photo_analysis, so those phases run side by side. pyplot phases and
+        # the photo cache's SQLite connection stay on the main thread. A
+        # profile only sees the main thread, so profiled runs go in order.
+        if self.metrics_path or self.profile_path:
+            start_run(self.profile_path or "")
+        graph = StageGraph(concurrent=self.concurrent_stages and not self.profile_path)
+        graph.add('load_images', self.load_images, kind='main')
+        graph.add('categorize', self.categorize_all_photos, after=['load_images'], kind='main')
+        graph.add('contact_sheet', self.generate_photo_contact_sheet, after=['categorize'])
+        graph.add('category_summary', self.create_photo_category_summary, after=['categorize'], kind='main')
+        graph.add('reports', self.generate_team_summary_report, after=['categorize'])
+        graph.add('timeline', self.create_photo_timeline, after=['categorize'], kind='main')
+        try:
+            graph.run()
+        finally:
+            run = end_run()
+            if self.cache:
+                self.cache.close()
+        if run and self.metrics_path:
+            run.write(self.metrics_path, pipeline=graph.summary(), photos=len(self.photo_analysis))
         
         # Final summary
         print("\n" + "="*80)
@@ -688,14 +933,133 @@ With the current form in San Antonio League and strong team morale, Islanders Cr
         print(f"✓ Executive Reports: 2 formats (MD + HTML)")
         print(f"✓ Timeline Visualization: Generated")
         print(f"\n📁 All outputs saved to: {self.output_path}")
+        print("\n⏱ Stage timings (* = critical path):")
+        for line in graph.report():
+            print(f"   {line}")
+        if run and self.metrics_path:
+            print(f"✓ Run metrics: {self.metrics_path}")
+        if run and run.profile_path:
+            print(f"✓ Profile: {run.profile_path}")
         print("\n🏆 Islanders Cricket Club - Champions in the Making! 🏆\n")
         print("="*80)
 
 
+def benchmark_decode(image_paths, color_tolerance=2.0, ocr_gate='recall'):
+    """
+    Time full-resolution vs reduced-resolution color sampling on a gallery
+    and check that both paths categorize every photo the same way. With
+    Tesseract installed, also time both paths with OCR on (photos that go
+    to OCR are still decoded at full resolution).
+    """
+    print(f"\n⏱ Decode benchmark on {len(image_paths)} photos")
+    timings = {}
+    records = {}
+    for label, fast in (('full', False), ('fast', True)):
+        start = time.perf_counter()
+        records[label] = [ingest_image(path, ocr=False, fast_decode=fast) for path in image_paths]
+        timings[label] = time.perf_counter() - start
+        print(f"   • {label} decode: {timings[label]:.2f}s "
+              f"({timings[label] / max(len(image_paths), 1) * 1000:.1f} ms/photo)")
+    
+    full_pixels = fast_pixels = 0
+    for path in image_paths:
+        with Image.open(path) as img:
+            full_pixels += img.size[0] * img.size[1]
+            img.draft('RGB', (COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE))
+            factor = max(min(img.size) // COLOR_SAMPLE_SIZE, 1)
+            fast_pixels += (img.size[0] // factor) * (img.size[1] // factor)
+    
+    pairs = [(full, fast) for full, fast in zip(records['full'], records['fast'])
+             if not full.get('error') and not fast.get('error')]
+    drift = max((np.abs(np.subtract(full['mean_color'], fast['mean_color'])).max() for full, fast in pairs),
+                default=0.0)
+    mismatched = [full['filename'] for full, fast in pairs
+                  if categorize_image(full)['category'] != categorize_image(fast)['category']]
+    
+    print(f"   • Speedup: {timings['full'] / max(timings['fast'], 1e-9):.1f}x")
+    if TESSERACT_AVAILABLE:
+        for label, fast in (('full', False), ('fast', True)):
+            start = time.perf_counter()
+            for path in image_paths:
+                ingest_image(path, ocr_gate=ocr_gate, fast_decode=fast)
+            timings[f'{label}_ocr'] = time.perf_counter() - start
+        print(f"   • With OCR ({ocr_gate} gate): {timings['full_ocr']:.2f}s -> {timings['fast_ocr']:.2f}s "
+              f"({timings['full_ocr'] / max(timings['fast_ocr'], 1e-9):.1f}x)")
+    else:
+        print("   • With OCR: not timed (Tesseract not installed)")
+    print(f"   • Decoded RGB bytes: {full_pixels * 3 / 1e6:.0f} MB -> {fast_pixels * 3 / 1e6:.1f} MB")
+    print(f"   • Max mean-color drift: {drift:.2f} (tolerance {color_tolerance})")
+    print(f"   • Category mismatches: {len(mismatched)} {mismatched if mismatched else ''}")
+    return drift <= color_tolerance and not mismatched
+
+
+def benchmark_classifier(images_dir, labels_csv=PHOTO_LABELS, extractors=None, ocr_gate='recall'):
+    """
+    Accuracy and CPU throughput of each feature extractor on the labelled
+    photos, next to the rule-based categorization. Accuracy is leave-one-out:
+    each photo is predicted by a classifier fitted on all the others.
+    """
+    paths, labels = load_labels(labels_csv, images_dir)
+    categories = list(CATEGORY_DESCRIPTIONS)
+    print(f"\n⏱ Classifier benchmark on {len(paths)} labelled photos "
+          f"({len(set(labels))} of {len(categories)} categories)")
+    
+    records = [ingest_image(path, ocr_gate=ocr_gate) for path in paths]
+    rules = [categorize_image(record)['category'] for record in records]
+    results = {'rules': rules}
+    print(f"   • rules: {np.mean(np.array(rules) == labels):.0%} correct")
+    
+    for extractor in (extractors or [factory() for factory in FEATURE_EXTRACTORS.values()]):
+        classifier = PhotoClassifier(extractor, categories)
+        start = time.perf_counter()
+        images = load_batch(paths, extractor.input_size)
+        decode_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        features = extractor(images)
+        classifier.fit_features(features, labels).score_features(features)
+        score_seconds = time.perf_counter() - start
+        predictions = leave_one_out_predictions(classifier, features, labels)
+        results[extractor.name] = predictions
+        print(f"   • {extractor.name}: {np.mean(np.array(predictions) == labels):.0%} correct, "
+              f"decode {len(paths) / decode_seconds:.0f} images/sec, "
+              f"features + scores {len(paths) / max(score_seconds, 1e-9):.0f} images/sec")
+    
+    print("   • Per category (correct/labelled):")
+    for category in sorted(set(labels)):
+        mask = np.array(labels) == category
+        counts = ', '.join(f"{name} {(np.array(predicted)[mask] == category).sum()}"
+                           for name, predicted in results.items())
+        print(f"      {category}: {mask.sum()} labelled - {counts}")
+    return results
+
+
 def main():
     """Main execution function"""
     # Initialize analytics engine
-    analytics = IslandersCricketAnalytics()
+    analytics = IslandersCricketAnalytics(
+        cache_path=None if '--no-cache' in sys.argv[1:] else "",
+        dedup_distance=DUPLICATE_DISTANCE if '--dedup' in sys.argv[1:] else None)
+    
+    if '--prune-cache' in sys.argv[1:]:
+        if analytics.cache is None:
+            print("⚠ Photo cache is disabled (--no-cache or cache_path=None); nothing to prune")
+            sys.exit(1)
+        removed, kept = analytics.cache.prune()
+        analytics.cache.close()
+        print(f"✓ Photo cache pruned: {removed} stale entries removed, {kept} kept")
+        return
+    
+    if '--benchmark-decode' in sys.argv[1:]:
+        analytics.load_images()
+        sys.exit(0 if benchmark_decode(analytics.images, ocr_gate=analytics.ocr_gate) else 1)
+    
+    if '--benchmark-classifier' in sys.argv[1:]:
+        benchmark_classifier(analytics.project_path, ocr_gate=analytics.ocr_gate)
+        return
+    
+    if '--classifier' in sys.argv[1:]:
+        analytics.classifier = train_classifier(PHOTO_LABELS, analytics.project_path,
+                                                list(CATEGORY_DESCRIPTIONS))
     
     # Run complete analysis
     analytics.run_complete_analysis()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Islanders Cricket Club - Photo Classifier
+Batch scoring of photos against every photo category at once.
+
+A PhotoClassifier pairs a CPU feature extractor (color histograms, HOG, a
+small ONNX model, or a combination) with nearest-centroid scoring trained
+on labelled photos. A batch of photos is decoded small, letterboxed into one
+uint8 array, featurized and scored against all categories with a few numpy
+operations, instead of a per-photo chain of rules.
+"""
+
+import os
+import csv
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from image_ingest import reduced_decode
+
+CLASSIFIER_SIZE = 64  # Square input side (px) for the histogram and HOG extractors
+CLASSIFIER_BATCH = 32
+
+
+def load_batch(image_paths: Sequence[str], size: int = CLASSIFIER_SIZE) -> np.ndarray:
+    """
+    Decode photos into one (n, size, size, 3) uint8 array. Each photo is
+    shrunk to fit and centred on black, so its aspect ratio shows up in the
+    features (landscape team photos, portrait award shots).
+    """
+    batch = np.zeros((len(image_paths), size, size, 3), dtype=np.uint8)
+    for i, path in enumerate(image_paths):
+        img = reduced_decode(path, size)
+        img.thumbnail((size, size), Image.Resampling.BILINEAR)
+        top, left = (size - img.height) // 2, (size - img.width) // 2
+        batch[i, top:top + img.height, left:left + img.width] = np.asarray(img)
+    return batch
+
+
+def _l2_normalize(features: np.ndarray) -> np.ndarray:
+    return features / np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-12)
+
+
+class ColorHistogramFeatures:
+    """Joint RGB histogram of the top, middle and bottom thirds (sky, people, grass)."""
+
+    def __init__(self, bins: int = 4, bands: int = 3):
+        self.name = 'histogram'
+        self.input_size = CLASSIFIER_SIZE
+        self.bins = bins
+        self.bands = bands
+
+    def __call__(self, images: np.ndarray) -> np.ndarray:
+        n, height, width, _ = images.shape
+        q = (images.astype(np.int32) * self.bins) >> 8
+        color = (q[..., 0] * self.bins + q[..., 1]) * self.bins + q[..., 2]
+        band = (np.arange(height) * self.bands // height)[None, :, None]
+        per_image = self.bands * self.bins ** 3
+        index = np.arange(n)[:, None, None] * per_image + band * self.bins ** 3 + color
+        counts = np.bincount(index.ravel(), minlength=n * per_image).reshape(n, per_image)
+        return _l2_normalize(np.sqrt(counts.astype(np.float32)))
+
+
+class HOGFeatures:
+    """Histogram of oriented gradients on a cells x cells grid (no block normalization)."""
+
+    def __init__(self, cells: int = 8, orientations: int = 9):
+        self.name = 'hog'
+        self.input_size = CLASSIFIER_SIZE
+        self.cells = cells
+        self.orientations = orientations
+
+    def __call__(self, images: np.ndarray) -> np.ndarray:
+        n, height, width, _ = images.shape
+        gray = images.astype(np.float32).mean(axis=3)
+        gx = np.zeros_like(gray)
+        gy = np.zeros_like(gray)
+        gx[:, :, 1:-1] = gray[:, :, 2:] - gray[:, :, :-2]
+        gy[:, 1:-1, :] = gray[:, 2:, :] - gray[:, :-2, :]
+        magnitude = np.hypot(gx, gy)
+        angle = np.arctan2(gy, gx) % np.pi  # unsigned orientation
+        orientation = np.minimum((angle * self.orientations / np.pi).astype(np.int64), self.orientations - 1)
+
+        cell = ((np.arange(height) * self.cells // height)[:, None] * self.cells
+                + (np.arange(width) * self.cells // width)[None, :])
+        per_image = self.cells * self.cells * self.orientations
+        index = (np.arange(n)[:, None, None] * per_image + cell[None] * self.orientations + orientation)
+        hist = np.bincount(index.ravel(), weights=magnitude.ravel(), minlength=n * per_image)
+        return _l2_normalize(np.sqrt(hist.reshape(n, per_image).astype(np.float32)))
+
+
+class ONNXFeatures:
+    """
+    Embeddings (or logits) from an ONNX image model on CPU, e.g. a
+    MobileNet exported with a dynamic batch axis. Inputs are NCHW float32
+    with ImageNet normalization. Needs the optional onnxruntime package.
+    """
+
+    def __init__(self, model_path: str, input_size: int = 224, batch_size: int = CLASSIFIER_BATCH):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("ONNXFeatures needs onnxruntime (pip install onnxruntime)")
+        self.session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.name = f"onnx:{os.path.basename(model_path)}"
+        self.input_size = input_size
+        self.batch_size = batch_size
+        self.mean = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+        self.std = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+    def __call__(self, images: np.ndarray) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(images), self.batch_size):
+            chunk = (images[start:start + self.batch_size].astype(np.float32) / 255 - self.mean) / self.std
+            result = self.session.run(None, {self.input_name: chunk.transpose(0, 3, 1, 2)})[0]
+            outputs.append(result.reshape(len(chunk), -1))
+        return _l2_normalize(np.concatenate(outputs).astype(np.float32))
+
+
+class CombinedFeatures:
+    """Several extractors side by side; photos are decoded at the largest input size."""
+
+    def __init__(self, *extractors):
+        self.extractors = extractors
+        self.name = '+'.join(e.name for e in extractors)
+        self.input_size = max(e.input_size for e in extractors)
+
+    def __call__(self, images: np.ndarray) -> np.ndarray:
+        return np.concatenate([e(_resize_batch(images, e.input_size)) for e in self.extractors], axis=1)
+
+
+def _resize_batch(images: np.ndarray, size: int) -> np.ndarray:
+    if images.shape[1] == size:
+        return images
+    return np.stack([np.asarray(Image.fromarray(img).resize((size, size), Image.Resampling.BILINEAR))
+                     for img in images])
+
+
+FEATURE_EXTRACTORS = {
+    'histogram': lambda: ColorHistogramFeatures(),
+    'hog': lambda: HOGFeatures(),
+    'histogram+hog': lambda: CombinedFeatures(ColorHistogramFeatures(), HOGFeatures()),
+}
+
+
+class PhotoClassifier:
+    """
+    Nearest-centroid classifier over standardized features. scores() gives
+    the cosine similarity of each photo to each category's centroid;
+    categories with no training photos score -inf and are never predicted.
+    """
+
+    def __init__(self, extractor, categories: Sequence[str]):
+        self.extractor = extractor
+        self.categories = list(categories)
+        self.centroids = None
+
+    @property
+    def input_size(self) -> int:
+        return self.extractor.input_size
+
+    def fit_features(self, features: np.ndarray, labels: Sequence[str]) -> 'PhotoClassifier':
+        unknown = set(labels) - set(self.categories)
+        if unknown:
+            raise ValueError(f"Unknown categories in labels: {', '.join(sorted(unknown))}")
+        self.mean = features.mean(axis=0)
+        self.scale = features.std(axis=0) + 1e-6
+        standardized = (features - self.mean) / self.scale
+        labels = np.asarray(labels)
+        self.trained = np.array([(labels == category).any() for category in self.categories])
+        self.centroids = np.zeros((len(self.categories), features.shape[1]), dtype=np.float32)
+        for i in np.flatnonzero(self.trained):
+            self.centroids[i] = standardized[labels == self.categories[i]].mean(axis=0)
+        self.centroids = _l2_normalize(self.centroids)
+        return self
+
+    def fit(self, images: np.ndarray, labels: Sequence[str]) -> 'PhotoClassifier':
+        return self.fit_features(self.extractor(images), labels)
+
+    def score_features(self, features: np.ndarray) -> np.ndarray:
+        """(n, len(categories)) similarity scores."""
+        if self.centroids is None:
+            raise RuntimeError("PhotoClassifier must be fitted before scoring")
+        standardized = _l2_normalize((features - self.mean) / self.scale)
+        scores = standardized @ self.centroids.T
+        scores[:, ~self.trained] = -np.inf
+        return scores
+
+    def scores(self, images: np.ndarray) -> np.ndarray:
+        return self.score_features(self.extractor(images))
+
+    def predict(self, images: np.ndarray) -> List[str]:
+        return [self.categories[i] for i in self.scores(images).argmax(axis=1)]
+
+    def classify_paths(self, image_paths: Sequence[str], batch_size: int = CLASSIFIER_BATCH) -> List[str]:
+        """Predicted category per photo, decoding and scoring batch_size photos at a time."""
+        predictions = []
+        for start in range(0, len(image_paths), batch_size):
+            predictions += self.predict(load_batch(image_paths[start:start + batch_size], self.input_size))
+        return predictions
+
+
+def load_labels(labels_csv: str, images_dir: str) -> Tuple[List[str], List[str]]:
+    """(paths, categories) from a filename,category CSV; files missing from images_dir are skipped."""
+    paths, labels = [], []
+    with open(labels_csv, newline='') as f:
+        for row in csv.DictReader(f):
+            path = os.path.join(images_dir, row['filename'])
+            if os.path.isfile(path):
+                paths.append(path)
+                labels.append(row['category'])
+    return paths, labels
+
+
+def leave_one_out_predictions(classifier: PhotoClassifier, features: np.ndarray,
+                              labels: Sequence[str]) -> List[str]:
+    """Predict each labelled photo with a classifier fitted on all the others."""
+    predictions = []
+    for i in range(len(labels)):
+        others = np.arange(len(labels)) != i
+        classifier.fit_features(features[others], [label for j, label in enumerate(labels) if j != i])
+        predictions.append(classifier.categories[int(classifier.score_features(features[i:i + 1]).argmax())])
+    return predictions
+
+
+def train_classifier(labels_csv: str, images_dir: str, categories: Sequence[str],
+                     extractor: str = 'histogram+hog') -> PhotoClassifier:
+    """Fit a classifier on the labelled photos found in images_dir."""
+    paths, labels = load_labels(labels_csv, images_dir)
+    if not paths:
+        raise ValueError(f"No labelled photos from {labels_csv} found in {images_dir}")
+    if extractor not in FEATURE_EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{extractor}'. Choose from: {', '.join(FEATURE_EXTRACTORS)}")
+    classifier = PhotoClassifier(FEATURE_EXTRACTORS[extractor](), categories)
+    return classifier.fit(load_batch(paths, classifier.input_size), labels)